@@ -0,0 +1,1662 @@
+# =========================================
+# COMMENT ENGINE - Table-driven report comment generation
+# Compiles one "comment plan" per (year, subject, variant) so that
+# generating a comment is a dict lookup plus a fixed render.
+# No Streamlit imports here: safe to use from scripts and workers.
+# =========================================
+
+import hashlib
+import importlib
+import io
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import pickle
+import random
+import re
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+TARGET_CHARS = 499
+
+# Pronoun sets produced by get_pronouns; bank text is pre-resolved for each
+PRONOUN_SETS = (("he", "his"), ("she", "her"), ("they", "their"))
+
+# ========== SUBJECT LAYOUTS ==========
+# Each achievement slot is (candidate bank names, sentence prefix) and each
+# target slot is (candidate bank names, sentence lead). The first bank name
+# found in the module is used, so years may name their banks differently.
+SUBJECT_LAYOUTS = {
+    "English": {
+        "achievement": [
+            (("reading_bank",), "In reading, "),
+            (("writing_bank",), "In writing, "),
+        ],
+        "targets": [
+            (("reading_target_bank",), "For the next term, "),
+            (("writing_target_bank",), "Additionally, "),
+        ],
+    },
+    "Maths": {
+        "achievement": [
+            (("number_bank", "number_and_algebra_bank", "maths_bank"), ""),
+        ],
+        "targets": [
+            (("target_bank",), "For the next term, "),
+        ],
+    },
+    "Science": {
+        "achievement": [
+            (("science_bank",), ""),
+        ],
+        "targets": [
+            (("target_bank",), "For the next term, "),
+        ],
+    },
+}
+
+# ========== STATEMENT BANK REGISTRY ==========
+# Bank modules are found by filename, e.g. statements_year7_science_variant2.py
+# -> (7, "Science", 2). Nothing is imported until a plan is first requested.
+BANK_DIR = os.path.dirname(os.path.abspath(__file__))
+BANK_FILE_PATTERN = re.compile(r'^statements_year(\d+)_([A-Za-z]+)_variant(\d+)\.py$')
+
+# Bank modules that were found but cannot be used, mapped to the reason.
+# Filled by discovery and snapshot builds so the app can report them.
+SKIPPED_BANKS = {}
+
+def discover_bank_modules(bank_dir=BANK_DIR):
+    """
+    Map (year, subject, variant) to module name for every bank file.
+    Files for a subject with no SUBJECT_LAYOUTS entry are left out and
+    recorded in SKIPPED_BANKS, since no plan could be built from them.
+    """
+    modules = {}
+    for filename in sorted(os.listdir(bank_dir)):
+        match = BANK_FILE_PATTERN.match(filename)
+        if match:
+            year, subject, variant = match.groups()
+            subject = subject.capitalize()
+            if subject not in SUBJECT_LAYOUTS:
+                SKIPPED_BANKS[filename[:-3]] = f"no SUBJECT_LAYOUTS entry for {subject}"
+                continue
+            modules[(int(year), subject, int(variant))] = filename[:-3]
+    return modules
+
+BANK_MODULES = discover_bank_modules()
+
+def bank_years():
+    return sorted({year for year, _, _ in BANK_MODULES})
+
+def bank_subjects():
+    return sorted({subject for _, subject, _ in BANK_MODULES})
+
+def bank_variants(year=None, subject=None):
+    return sorted({variant for key_year, key_subject, variant in BANK_MODULES
+                   if year in (None, key_year) and subject in (None, key_subject)})
+
+# Relative weight of each bank when a batch mixes variants. Keys are either
+# a variant number or a full (year, subject, variant) key, which wins;
+# banks not listed weigh 1.0 and a weight of 0 never gets picked.
+VARIANT_WEIGHTS = {
+    1: 1.0,
+    2: 1.0,
+}
+
+def variant_weight(year, subject, variant):
+    return float(VARIANT_WEIGHTS.get((year, subject, variant), VARIANT_WEIGHTS.get(variant, 1.0)))
+
+# ========== VARIANT SAMPLING ==========
+class AliasSampler:
+    """
+    Walker/Vose alias table over weighted outcomes: O(n) to build, then
+    O(1) per draw whatever the number of outcomes or their weights.
+    """
+
+    def __init__(self, outcomes, weights):
+        weights = np.asarray(weights, dtype=float)
+        if len(outcomes) != len(weights) or not len(weights) or weights.min() < 0 or weights.sum() <= 0:
+            raise ValueError("AliasSampler needs one non-negative weight per outcome and a positive total")
+        n = len(weights)
+        scaled = weights * n / weights.sum()
+        prob = np.ones(n)
+        alias = np.arange(n)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        self.outcomes = np.asarray(outcomes)
+        self.prob = prob
+        self.alias = alias
+
+    def pick(self, u):
+        """
+        Outcome(s) for uniform draw(s) u in [0, 1). The integer part of
+        u * n picks a column and the fraction decides column vs alias, so
+        one uniform per draw is enough; u may be a float or an array.
+        """
+        scaled = np.asarray(u, dtype=float) * len(self.prob)
+        column = np.minimum(scaled.astype(np.int64), len(self.prob) - 1)
+        chosen = np.where(scaled - column < self.prob[column], column, self.alias[column])
+        return self.outcomes[chosen]
+
+    def sample(self, rng, size):
+        """size draws from a NumPy generator"""
+        return self.pick(rng.random(size))
+
+_variant_samplers = {}
+
+def variant_sampler(year, subject):
+    """AliasSampler over the banks for (year, subject), weighted by VARIANT_WEIGHTS"""
+    sampler = _variant_samplers.get((year, subject))
+    if sampler is None:
+        variants = bank_variants(year, subject)
+        if not variants:
+            raise KeyError(f"No statement bank for Year {year} {subject}")
+        sampler = AliasSampler(variants, [variant_weight(year, subject, v) for v in variants])
+        _variant_samplers[(year, subject)] = sampler
+    return sampler
+
+# ========== TEXT HELPERS ==========
+def lowercase_first(text):
+    return text[0].lower() + text[1:] if text else ""
+
+def truncate_comment(comment, target=TARGET_CHARS):
+    if len(comment) <= target:
+        return comment
+    truncated = comment[:target].rstrip(" ,;.")
+    if "." in truncated:
+        truncated = truncated[:truncated.rfind(".")+1]
+    return truncated
+
+# One alternation covers every masculine form, so a single scan rewrites the
+# text and no pass can re-match another pass's output.
+PRONOUN_PATTERN = re.compile(r'\b(?:himself|herself|him|his|he)\b', re.IGNORECASE)
+OBJECT_PRONOUNS = {"he": "him", "she": "her", "they": "them"}
+REFLEXIVE_PRONOUNS = {"he": "himself", "she": "herself", "they": "themselves"}
+
+_pronoun_tables = {}
+
+def _pronoun_table(pronoun, possessive):
+    table = _pronoun_tables.get((pronoun, possessive))
+    if table is None:
+        reflexive = REFLEXIVE_PRONOUNS.get(pronoun, f"{pronoun}self")
+        table = {
+            'he': pronoun,
+            'his': possessive,
+            'him': OBJECT_PRONOUNS.get(pronoun, pronoun),
+            'himself': reflexive,
+            'herself': reflexive,
+        }
+        _pronoun_tables[(pronoun, possessive)] = table
+    return table
+
+def _match_case(word, replacement):
+    if len(word) > 1 and word.isupper():
+        return replacement.upper()
+    if word[0].isupper():
+        return replacement.capitalize()
+    return replacement
+
+def fix_pronouns_in_text(text, pronoun, possessive):
+    """Fix gender pronouns in statement text in one case-preserving pass"""
+    if not text:
+        return text
+    table = _pronoun_table(pronoun, possessive)
+    return PRONOUN_PATTERN.sub(lambda m: _match_case(m.group(), table[m.group().lower()]), text)
+
+# ========== BAND INDEX ==========
+# Banks are keyed by discrete bands (90, 85, ... 40, 0). Any numeric score
+# snaps to the highest band at or below it, or to the lowest band.
+def snap_band(bands, score):
+    """Snap one score onto a sorted band tuple in O(log n)"""
+    return bands[max(bisect_right(bands, score) - 1, 0)]
+
+def snap_scores(bands, scores):
+    """Vectorized snap_band over a whole column of scores"""
+    bands = np.asarray(bands)
+    positions = np.searchsorted(bands, np.asarray(scores, dtype=float), side='right') - 1
+    return bands[np.maximum(positions, 0)]
+
+def snap_plan_scores(plan, att, achieve, target):
+    bands = plan['bands']
+    return (snap_band(bands['attitude'], att),
+            snap_band(bands['achievement'], achieve),
+            snap_band(bands['target'], target))
+
+def _band_union(banks):
+    return tuple(sorted(set().union(*banks)))
+
+def _cover_bands(bank, bands):
+    """Copy of bank with an entry for every band, so snapped lookups never miss"""
+    own_bands = tuple(sorted(bank))
+    return {band: bank[snap_band(own_bands, band)] for band in bands}
+
+# ========== COMMENT PLANS ==========
+def _find_bank(module, names):
+    for bank_name in names:
+        if hasattr(module, bank_name):
+            return getattr(module, bank_name)
+    raise ImportError(f"{module.__name__} defines none of: {', '.join(names)}")
+
+def _capitalize_first(text):
+    return text[0].upper() + text[1:] if text else ""
+
+def _achievement_sentence(prefix, text, p):
+    if not text:
+        return ""
+    if text[0].islower():
+        text = f"{p} {text}"
+    sentence = _capitalize_first(f"{prefix}{text}")
+    if not sentence.endswith('.'):
+        sentence += '.'
+    return sentence
+
+def _target_sentence(lead, text, p):
+    if not text:
+        return ""
+    text = lowercase_first(text)
+    if text.startswith("should "):  # some banks already include the modal
+        text = text[len("should "):]
+    sentence = _capitalize_first(f"{lead}{p} should {text}")
+    if not sentence.endswith('.'):
+        sentence += '.'
+    return sentence
+
+def _attitude_tail(text):
+    """The attitude sentence after the name, e.g. " worked hard." """
+    tail = f" {text}"
+    if not tail.endswith('.'):
+        tail += '.'
+    return tail
+
+def _closer_sentence(closer):
+    return closer if closer.endswith('.') else f"{closer}."
+
+def compile_template(plan, pronouns):
+    """
+    Compile the plan's slots for one pronoun set: every band of every slot
+    becomes a finished sentence (pronouns resolved, prefix and lead added,
+    capitalised and punctuated), with its length for the composer. Only the
+    student name and attitude target are left to insert at render time.
+    """
+    p, p_poss = pronouns
+    attitude = {band: _attitude_tail(fix_pronouns_in_text(text, p, p_poss))
+                for band, text in plan['attitude'].items()}
+    achievement = [{band: _achievement_sentence(prefix, fix_pronouns_in_text(text, p, p_poss), p)
+                    for band, text in bank.items()}
+                   for prefix, bank in plan['achievement']]
+    targets = [{band: _target_sentence(lead, fix_pronouns_in_text(text, p, p_poss), p)
+                for band, text in bank.items()}
+               for lead, bank in plan['targets']]
+    return {
+        'attitude': attitude,
+        'achievement': achievement,
+        'targets': targets,
+        'lengths': {
+            'attitude': {band: len(tail) for band, tail in attitude.items()},
+            'achievement': [{band: len(sentence) for band, sentence in slot.items()}
+                            for slot in achievement],
+            'targets': [{band: len(sentence) for band, sentence in slot.items()}
+                        for slot in targets],
+        },
+    }
+
+def _pair_lengths(opening_heads, closer_sentences):
+    """Every (opening, closer) pair sorted by combined rendered length"""
+    pairs = sorted(
+        (len(head) + len(closer), o, c)
+        for o, head in enumerate(opening_heads)
+        for c, closer in enumerate(closer_sentences)
+    )
+    return tuple(total for total, _, _ in pairs), tuple((o, c) for _, o, c in pairs)
+
+def build_comment_plan(key, module):
+    """Compile a statement module into the plan used by render_comment"""
+    year, subject, variant = key
+    layout = SUBJECT_LAYOUTS[subject]
+    achievement = [(prefix, _find_bank(module, names))
+                   for names, prefix in layout['achievement']]
+    targets = [(lead, _find_bank(module, names))
+               for names, lead in layout['targets']]
+    bands = {
+        'attitude': _band_union([module.attitude_bank]),
+        'achievement': _band_union([bank for _, bank in achievement]),
+        'target': _band_union([bank for _, bank in targets]),
+    }
+    plan = {
+        'key': key,
+        'bands': bands,
+        'openings': list(module.opening_phrases),
+        'attitude': _cover_bands(module.attitude_bank, bands['attitude']),
+        'achievement': [(prefix, _cover_bands(bank, bands['achievement']))
+                        for prefix, bank in achievement],
+        'targets': [(lead, _cover_bands(bank, bands['target']))
+                    for lead, bank in targets],
+        'closers': list(module.closer_bank),
+    }
+    plan['opening_heads'] = [f"{opening} " for opening in plan['openings']]
+    plan['closer_sentences'] = [_closer_sentence(closer) for closer in plan['closers']]
+    plan['pair_lengths'] = _pair_lengths(plan['opening_heads'], plan['closer_sentences'])
+    plan['templates'] = {pronouns: compile_template(plan, pronouns) for pronouns in PRONOUN_SETS}
+    return plan
+
+def get_template(plan, pronouns):
+    """Compiled slot template, precomputed for the standard pronoun sets"""
+    pronouns = tuple(pronouns)
+    template = plan['templates'].get(pronouns)
+    if template is None:
+        template = compile_template(plan, pronouns)
+    return template
+
+# Process-wide cache of compiled plans, filled on first request. Two threads
+# racing on the same key just build the same plan twice.
+_comment_plans = {}
+
+def get_comment_plan(year, subject, variant=1):
+    """Return the compiled plan for a bank, importing it on first use"""
+    key = (year, subject, variant)
+    plan = _comment_plans.get(key)
+    if plan is None:
+        module_name = BANK_MODULES.get(key)
+        if module_name is None:
+            raise KeyError(f"No statement bank for Year {year} {subject} (variant {variant})")
+        plan = build_comment_plan(key, importlib.import_module(module_name))
+        _comment_plans[key] = plan
+    return plan
+
+# ========== PLAN SNAPSHOT ==========
+# All compiled plans (pronoun templates, fragment lengths, band indexes)
+# pickled into one file, tagged with a hash of the bank modules and of this
+# engine so that editing either invalidates it.
+PLAN_SNAPSHOT_PATH = os.path.join(BANK_DIR, "statement_banks.snapshot")
+PLAN_SNAPSHOT_VERSION = 1
+_source_hash = None
+
+def bank_source_hash():
+    """sha256 over this module and every discovered bank module's source"""
+    global _source_hash
+    if _source_hash is None:
+        digest = hashlib.sha256()
+        for filename in [os.path.basename(__file__),
+                         *sorted(f"{name}.py" for name in BANK_MODULES.values())]:
+            digest.update(filename.encode())
+            with open(os.path.join(BANK_DIR, filename), 'rb') as f:
+                digest.update(f.read())
+        _source_hash = digest.hexdigest()
+    return _source_hash
+
+def build_plan_snapshot(path=PLAN_SNAPSHOT_PATH):
+    """
+    Compile every bank and write the snapshot atomically. A bank that
+    fails to compile is dropped from BANK_MODULES and recorded in
+    SKIPPED_BANKS instead of stopping the others.
+    """
+    global _source_hash
+    plans = {}
+    for key, module_name in list(BANK_MODULES.items()):
+        try:
+            plans[key] = get_comment_plan(*key)
+        except Exception as e:  # any error in a bank module is that bank's problem
+            SKIPPED_BANKS[module_name] = f"{type(e).__name__}: {e}"
+            del BANK_MODULES[key]
+            _source_hash = None  # hash only the banks that made it into the snapshot
+    snapshot = {'version': PLAN_SNAPSHOT_VERSION, 'source_hash': bank_source_hash(), 'plans': plans}
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+    return len(plans)
+
+def load_plan_snapshot(path=PLAN_SNAPSHOT_PATH, rebuild=True):
+    """
+    Fill the plan cache from the snapshot in one read. A missing or stale
+    snapshot is rebuilt when rebuild is set (and the directory is writable);
+    otherwise plans keep loading lazily. Returns True if the snapshot was used.
+    """
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+        if (snapshot.get('version') == PLAN_SNAPSHOT_VERSION
+                and snapshot.get('source_hash') == bank_source_hash()):
+            _comment_plans.update(snapshot['plans'])
+            return True
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    if rebuild:
+        try:
+            build_plan_snapshot(path)
+        except OSError:
+            pass
+    return False
+
+# ========== RENDERING ==========
+def _body_sentences(template, achieve, target):
+    """Achievement and target sentences; shared by every student in a band group"""
+    sentences = [slot[achieve] for slot in template['achievement']]
+    sentences += [slot[target] for slot in template['targets']]
+    return [sentence for sentence in sentences if sentence]
+
+def _finish_comment(first, sentences, target=TARGET_CHARS):
+    """
+    Build the final comment in one join. Every sentence already ends with
+    a full stop, so whole trailing sentences that would pass target are
+    dropped by tracking the running length before anything is joined.
+    """
+    if len(first) > target:
+        return truncate_comment(first, target)
+    parts = [first]
+    length = len(first)
+    for sentence in sentences:
+        if not sentence:
+            continue
+        length += 1 + len(sentence)
+        if length > target:
+            break
+        parts.append(sentence)
+    return " ".join(parts)
+
+def _render_skeleton(plan, template, att, achieve, target, opening_idx, closer_idx):
+    """
+    Name-free comment as (opening, sentences): the student name goes between
+    the opening and the first sentence, the attitude tail.
+    """
+    sentences = [template['attitude'][att]]
+    sentences += _body_sentences(template, achieve, target)
+    sentences.append(plan['closer_sentences'][closer_idx])
+    return plan['opening_heads'][opening_idx], tuple(sentences)
+
+def _skeleton_length(template, att, achieve, target):
+    """Length of a skeleton, not counting the opening, name and closer"""
+    lengths = template['lengths']
+    total = lengths['attitude'][att] + 1  # the closer's leading space
+    for slot in lengths['achievement']:
+        total += slot[achieve] and slot[achieve] + 1
+    for slot in lengths['targets']:
+        total += slot[target] and slot[target] + 1
+    return total
+
+def student_seed(plan_key, name, att, achieve, target, pronouns, attitude_target="", salt="", draw=0):
+    """
+    Stable 64-bit seed for one student's comment.
+
+    Unlike hash(), the value is the same in every process, so a comment can
+    be reproduced, cached or generated in a worker without changing. draw
+    selects a different comment for the same inputs (Regenerate).
+    """
+    parts = (salt, tuple(plan_key), name, int(att), int(achieve), int(target),
+             tuple(pronouns), attitude_target or "", int(draw))
+    return int.from_bytes(hashlib.blake2b(repr(parts).encode(), digest_size=8).digest(), 'big')
+
+def _choose_indices(plan, seed, fixed_length):
+    """
+    Seeded (opening, closer) choice among the pairs that keep the comment
+    within TARGET_CHARS, given the length of everything else. If no pair
+    fits, truncation will drop the closer anyway, so the seed picks among
+    the openings that fit on their own (or all openings if none do).
+    """
+    totals, pairs = plan['pair_lengths']
+    budget = TARGET_CHARS - fixed_length
+    fitting = bisect_right(totals, budget)
+    rng = random.Random(seed)
+    if fitting:
+        return pairs[rng.randrange(fitting)]
+    heads = plan['opening_heads']
+    openings = [o for o, head in enumerate(heads) if len(head) <= budget] or range(len(heads))
+    return rng.choice(openings), rng.randrange(len(plan['closer_sentences']))
+
+def _attitude_target_sentence(attitude_target):
+    if not attitude_target:
+        return ""
+    sentence = _capitalize_first(attitude_target)
+    if not sentence.endswith('.'):
+        sentence += '.'
+    return sentence.replace('..', '.')
+
+def _alternative_indices(plan, seed, fixed_length):
+    """
+    Distinct (opening, closer) pairs in the order alternatives should use them.
+
+    The first is the _choose_indices() pick; the rest are a seeded shuffle
+    of the pairs that fit, preferring an opening and closer not used yet so
+    each alternative reads differently.
+    """
+    first = _choose_indices(plan, seed, fixed_length)
+    totals, pairs = plan['pair_lengths']
+    fitting = list(pairs[:bisect_right(totals, TARGET_CHARS - fixed_length)] or pairs)
+    random.Random(seed).shuffle(fitting)
+
+    yield first
+    used, openings, closers = {first}, {first[0]}, {first[1]}
+    for pair in fitting:
+        if pair[0] not in openings and pair[1] not in closers:
+            yield pair
+            used.add(pair)
+            openings.add(pair[0])
+            closers.add(pair[1])
+    for pair in fitting:
+        if pair not in used:
+            yield pair
+
+def _render_with_indices(plan, template, name, att, achieve, target, pronouns,
+                         attitude_target_sentence, opening_idx, closer_idx,
+                         cache=None, table=None):
+    key = (plan['key'], att, achieve, target, tuple(pronouns), opening_idx, closer_idx)
+    skeleton = table.get(key) if table is not None else None
+    if skeleton is None and cache is not None:
+        skeleton = cache.get(key)
+    if skeleton is None:
+        skeleton = _render_skeleton(plan, template, att, achieve, target, opening_idx, closer_idx)
+        if cache is not None:
+            cache.put(key, skeleton)
+
+    head, sentences = skeleton
+    return _finish_comment(f"{head}{name}{sentences[0]}", (*sentences[1:], attitude_target_sentence))
+
+def _prepare_render(plan, name, att, achieve, target, pronouns, attitude_target,
+                    seed, salt, draw):
+    att, achieve, target = snap_plan_scores(plan, att, achieve, target)
+    if seed is None:
+        seed = student_seed(plan['key'], name, att, achieve, target, pronouns,
+                            attitude_target, salt, draw)
+    template = get_template(plan, pronouns)
+    attitude_target_sentence = _attitude_target_sentence(attitude_target)
+    fixed_length = _skeleton_length(template, att, achieve, target) + len(name)
+    if attitude_target_sentence:
+        fixed_length += 1 + len(attitude_target_sentence)
+    return (att, achieve, target), seed, template, attitude_target_sentence, fixed_length
+
+def render_comment(plan, name, att, achieve, target, pronouns, attitude_target="",
+                   seed=None, salt="", draw=0, cache=None, table=None):
+    """
+    Render a comment from a compiled plan.
+
+    name and attitude_target must already be sanitized by the caller.
+    Scores may be raw marks; they are snapped onto the plan's bands.
+    The opening and closer are a random.Random(seed) choice among the pairs
+    that fit TARGET_CHARS; by default the seed is student_seed() of the
+    inputs, salt and draw.
+    The name-free part comes from table (a SkeletonTable) when given,
+    then from cache (a SkeletonCache), and is only rendered on a miss.
+    """
+    scores, seed, template, ats, fixed_length = _prepare_render(
+        plan, name, att, achieve, target, pronouns, attitude_target, seed, salt, draw)
+    opening_idx, closer_idx = _choose_indices(plan, seed, fixed_length)
+    return _render_with_indices(plan, template, name, *scores, pronouns, ats,
+                                opening_idx, closer_idx, cache, table)
+
+def render_comment_options(plan, name, att, achieve, target, pronouns, attitude_target="",
+                           count=4, seed=None, salt="", draw=0, cache=None, table=None):
+    """
+    Render up to count alternatives of the same comment in one go.
+
+    The first option is exactly what render_comment() returns for the same
+    arguments; each later one uses a different opening and closer where
+    enough pairs fit, so the list can back Regenerate without re-rendering.
+    """
+    scores, seed, template, ats, fixed_length = _prepare_render(
+        plan, name, att, achieve, target, pronouns, attitude_target, seed, salt, draw)
+    options = []
+    for opening_idx, closer_idx in _alternative_indices(plan, seed, fixed_length):
+        comment = _render_with_indices(plan, template, name, *scores, pronouns, ats,
+                                       opening_idx, closer_idx, cache, table)
+        # Pairs can render identically once truncation drops the closer
+        if comment not in options:
+            options.append(comment)
+            if len(options) >= count:
+                break
+    return options
+
+# ========== SKELETON CACHE ==========
+CACHE_ENTRY_OVERHEAD_BYTES = 400  # key tuple, dict slot and bookkeeping per entry
+
+class SkeletonCache:
+    """
+    Thread-safe LRU cache of name-free comment skeletons.
+
+    Entries expire after ttl_seconds and the least recently used ones are
+    evicted once the estimated size passes max_bytes. Names never enter
+    the cache, so it is safe to share between sessions.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl_seconds=6 * 3600):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, skeleton)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, skeleton):
+        head, sentences = skeleton
+        size = (sys.getsizeof(head) + sys.getsizeof(sentences)
+                + sum(sys.getsizeof(sentence) for sentence in sentences) + CACHE_ENTRY_OVERHEAD_BYTES)
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, skeleton)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+# ========== BATCH GENERATION ==========
+GENDER_PRONOUN_IDS = {"male": 0, "female": 1}  # index into PRONOUN_SETS; others -> they/their
+BATCH_SCORE_COLUMNS = {'Attitude': 'attitude', 'Achievement': 'achievement', 'Target': 'target'}
+
+def _batch_column(df, column, default):
+    if column in df.columns:
+        return df[column].reset_index(drop=True)
+    return pd.Series([default] * len(df))
+
+def _batch_variants(df, variant):
+    """variant as one number per row: an int applies to every row, otherwise one entry per row"""
+    if np.ndim(variant) == 0:
+        return pd.Series([variant] * len(df), dtype=float)
+    return pd.to_numeric(pd.Series(np.asarray(variant)), errors='coerce')
+
+def assign_variants(df, salt=""):
+    """
+    Pick a bank variant for every row of an upload, weighted by
+    VARIANT_WEIGHTS through each Year/Subject's AliasSampler.
+
+    Each row's draw is a hash of the salt, year, subject and name, so a
+    row keeps its variant however the upload is split. Rows without a
+    usable Year or a known bank get variant 1 and fail later as usual.
+    """
+    names = _batch_column(df, 'Student Name', '').fillna('').astype(str)
+    subjects = _batch_column(df, 'Subject', 'English').astype(str)
+    years = pd.to_numeric(_batch_column(df, 'Year', 7), errors='coerce')
+    variants = np.ones(len(df), dtype=np.int64)
+
+    keys = pd.DataFrame({'year': years, 'subject': subjects}).dropna()
+    for (year, subject), rows in keys.groupby(['year', 'subject']).groups.items():
+        try:
+            sampler = variant_sampler(int(year), subject)
+        except KeyError:
+            continue
+        draws = [int.from_bytes(hashlib.blake2b(repr((salt, int(year), subject, names[position])).encode(),
+                                                digest_size=8).digest(), 'big') / 2.0 ** 64
+                 for position in rows]
+        variants[rows] = sampler.pick(draws)
+    return pd.Series(variants, index=df.index)
+
+def _batch_inputs(df):
+    """Parse the columns that do not depend on the variant, once per upload"""
+    return {
+        'names': _batch_column(df, 'Student Name', '').fillna('').astype(str).tolist(),
+        'subjects': _batch_column(df, 'Subject', 'English').astype(str),
+        'years': pd.to_numeric(_batch_column(df, 'Year', 7), errors='coerce'),
+        'pronoun_ids': (_batch_column(df, 'Gender', '').astype(str).str.lower()
+                        .map(GENDER_PRONOUN_IDS).fillna(len(PRONOUN_SETS) - 1).astype(int)),
+        'scores': pd.DataFrame({kind: pd.to_numeric(_batch_column(df, column, 75), errors='coerce')
+                                for column, kind in BATCH_SCORE_COLUMNS.items()}),
+        'bands': {},  # snapped bands per (year, subject, band lists), shared by variants
+    }
+
+def _batch_groups(df, variant, errors, inputs=None):
+    """
+    Yield (plan, bands, pronouns, positions, names) for each group of valid
+    rows sharing a plan, snapped bands and pronoun set. variant is a bank
+    variant for every row or a sequence with one per row. Rows that cannot
+    be generated are recorded in errors by position instead. inputs, from
+    _batch_inputs(df), lets several passes over one upload share parsing.
+    """
+    inputs = inputs or _batch_inputs(df)
+    names, subjects, years = inputs['names'], inputs['subjects'], inputs['years']
+    pronoun_ids, scores = inputs['pronoun_ids'], inputs['scores']
+    variants = _batch_variants(df, variant)
+
+    for position in np.flatnonzero(variants.isna().to_numpy()):
+        errors[position] = "Variant is missing or not a number"
+    for position in np.flatnonzero(years.isna().to_numpy()):
+        errors[position] = "Year is missing or not a number"
+    for position in np.flatnonzero(scores.isna().any(axis=1).to_numpy() & years.notna().to_numpy()):
+        errors[position] = "Attitude/Achievement/Target must be numbers"
+
+    valid = years.notna() & scores.notna().all(axis=1) & variants.notna()
+    keys = pd.DataFrame({'year': years[valid].astype(int), 'subject': subjects[valid],
+                         'variant': variants[valid].astype(int)})
+
+    for (year, subject, row_variant), rows in keys.groupby(['year', 'subject', 'variant']).groups.items():
+        try:
+            plan = get_comment_plan(int(year), subject, int(row_variant))
+        except KeyError as e:
+            for position in rows:
+                errors[position] = e.args[0]
+            continue
+
+        band_key = (year, subject, tuple(rows), *(tuple(plan['bands'][kind]) for kind in BATCH_SCORE_COLUMNS.values()))
+        groups = inputs['bands'].get(band_key)
+        if groups is None:
+            bands = pd.DataFrame({kind: snap_scores(plan['bands'][kind], scores.loc[rows, kind])
+                                  for kind in BATCH_SCORE_COLUMNS.values()}, index=rows)
+            bands['pronouns'] = pronoun_ids[rows]
+            groups = [((att, achieve, target), PRONOUN_SETS[pronoun_id], members,
+                       [names[position] for position in members])
+                      for (att, achieve, target, pronoun_id), members
+                      in bands.groupby(list(bands.columns)).groups.items()]
+            inputs['bands'][band_key] = groups
+
+        for bands, pronouns, members, group_names in groups:
+            yield plan, bands, pronouns, members, group_names
+
+SAMPLING_MODES = ("row", "bulk", "cycle")
+
+def _render_group(plan, bands, pronouns, members, names, salt, comments):
+    """Render one _batch_groups group into comments with per-row seeds"""
+    template = plan['templates'][pronouns]
+    skeletons = {}
+    skeleton_length = _skeleton_length(template, *bands)
+    for position, name in zip(members, names):
+        seed = student_seed(plan['key'], name, *bands, pronouns, salt=salt)
+        indices = _choose_indices(plan, seed, skeleton_length + len(name))
+        skeleton = skeletons.get(indices)
+        if skeleton is None:
+            skeleton = _render_skeleton(plan, template, *bands, *indices)
+            skeletons[indices] = skeleton
+        head, sentences = skeleton
+        comments[position] = _finish_comment(f"{head}{name}{sentences[0]}", sentences[1:])
+
+def _batch_classes(df, variant, errors):
+    """
+    _batch_groups collected per plan: yields (plan, groups) once for every
+    Year/Subject class in the upload.
+    """
+    classes = {}
+    for group in _batch_groups(df, variant, errors):
+        classes.setdefault(group[0]['key'], []).append(group)
+    for groups in classes.values():
+        yield groups[0][0], groups
+
+def _phrase_lengths(plan):
+    """Opening head and closer lengths as arrays, indexed like the plan lists"""
+    return (np.fromiter(map(len, plan['opening_heads']), dtype=np.int64),
+            np.fromiter(map(len, plan['closer_sentences']), dtype=np.int64))
+
+def _class_rng(plan_key, salt):
+    """NumPy generator seeded from the salt and plan, stable across processes"""
+    digest = hashlib.blake2b(repr((salt, tuple(plan_key))).encode(), digest_size=8).digest()
+    return np.random.default_rng(int.from_bytes(digest, 'big'))
+
+def _bulk_indices(plan, fixed_lengths, rng, cycle=False):
+    """
+    (opening, closer) indices for a whole class at once, as an (n, 2) array.
+
+    Each row gets a uniform pick among the pairs that fit TARGET_CHARS,
+    drawn together from rng. Rows where no pair fits lose the closer to
+    truncation, so, as in _choose_indices, they pick among the openings
+    that fit on their own. With cycle, openings and closers are instead
+    dealt from shuffled decks so none repeats within the class until all
+    have been used; rows whose dealt pair (or, with no pair fitting,
+    dealt opening) would not fit keep their pick.
+    """
+    totals, pairs = plan['pair_lengths']
+    pairs = np.asarray(pairs, dtype=np.int64)
+    head_lengths, closer_lengths = _phrase_lengths(plan)
+    n = len(fixed_lengths)
+    budget = TARGET_CHARS - fixed_lengths
+    fitting = np.searchsorted(np.asarray(totals), budget, side='right')
+    chosen = pairs[(rng.random(n) * fitting).astype(np.int64)]
+
+    no_pair = fitting == 0
+    if no_pair.any():
+        alone = head_lengths[None, :] <= budget[no_pair, None]
+        alone[~alone.any(axis=1)] = True
+        picks = (rng.random(len(alone)) * alone.sum(axis=1)).astype(np.int64)
+        openings = (alone.cumsum(axis=1) > picks[:, None]).argmax(axis=1)
+        chosen[no_pair] = np.column_stack([openings, rng.integers(len(closer_lengths), size=len(openings))])
+    if not cycle:
+        return chosen
+
+    dealt = np.column_stack([
+        np.concatenate([rng.permutation(len(lengths)) for _ in range(-(-n // len(lengths)))])[:n]
+        for lengths in (head_lengths, closer_lengths)
+    ])
+    fits = fixed_lengths + head_lengths[dealt[:, 0]] + closer_lengths[dealt[:, 1]] <= TARGET_CHARS
+    opening_fits = (head_lengths[dealt[:, 0]] <= budget) | (head_lengths.min() > budget)
+    fits |= no_pair & opening_fits
+    return np.where(fits[:, None], dealt, chosen)
+
+def generate_comments_batch(df, variant=1, salt="", sampling="row"):
+    """
+    Generate one comment per row of a parsed upload.
+
+    Rows are grouped by (year, subject, bands, pronoun set) and each group
+    renders its name-free skeletons once per opening/closer pair, choosing
+    pairs that fit TARGET_CHARS just as render_comment does. Student names
+    must already be sanitized. variant is the bank variant for every row,
+    or one per row (e.g. from assign_variants) to mix variants.
+
+    sampling picks how the pairs are drawn:
+      "row"   - every row is seeded with student_seed(), so its comment
+                matches render_comment with the same salt regardless of how
+                the upload is grouped or chunked (default)
+      "bulk"  - indices for each Year/Subject class are drawn at once from
+                a NumPy generator seeded by the salt (see _bulk_indices)
+      "cycle" - as bulk, but no opening or closer repeats within a class
+                until every one has been used
+    The bulk modes depend on which rows share a class, so a chunked run
+    deals each chunk separately.
+
+    Returns (comments, errors): a Series aligned to df.index with None for
+    failed rows, and a dict mapping failed index labels to a message.
+    """
+    if sampling not in SAMPLING_MODES:
+        raise ValueError(f"sampling must be one of {SAMPLING_MODES}, not {sampling!r}")
+    comments = [None] * len(df)
+    errors = {}
+
+    if sampling == "row":
+        for group in _batch_groups(df, variant, errors):
+            _render_group(*group, salt, comments)
+    else:
+        for plan, groups in _batch_classes(df, variant, errors):
+            rows = sorted((position, name, bands, pronouns)
+                          for _, bands, pronouns, members, names in groups
+                          for position, name in zip(members, names))
+            skeleton_lengths = {(bands, pronouns): _skeleton_length(plan['templates'][pronouns], *bands)
+                                for _, bands, pronouns, _, _ in groups}
+            fixed_lengths = np.fromiter((skeleton_lengths[bands, pronouns] + len(name)
+                                         for _, name, bands, pronouns in rows), dtype=np.int64, count=len(rows))
+            indices = _bulk_indices(plan, fixed_lengths, _class_rng(plan['key'], salt),
+                                    cycle=sampling == "cycle")
+
+            skeletons = {}
+            for (position, name, bands, pronouns), (opening_idx, closer_idx) in zip(rows, indices.tolist()):
+                key = (bands, pronouns, opening_idx, closer_idx)
+                skeleton = skeletons.get(key)
+                if skeleton is None:
+                    skeleton = _render_skeleton(plan, plan['templates'][pronouns], *bands,
+                                                opening_idx, closer_idx)
+                    skeletons[key] = skeleton
+                head, sentences = skeleton
+                comments[position] = _finish_comment(f"{head}{name}{sentences[0]}", sentences[1:])
+
+    errors = {df.index[position]: message for position, message in sorted(errors.items())}
+    return pd.Series(comments, index=df.index, dtype=object), errors
+
+def rows_for_variant(df, variant):
+    """
+    Boolean array of the rows to generate for variant when producing every
+    variant: rows whose Year/Subject has that bank, plus rows whose
+    Year/Subject has no bank at all (so they still fail as usual). Rows
+    whose Year/Subject just has fewer variants are left out.
+    """
+    years = pd.to_numeric(_batch_column(df, 'Year', 7), errors='coerce').fillna(-1).astype(int)
+    pairs = pd.MultiIndex.from_arrays([years, _batch_column(df, 'Subject', 'English').astype(str)])
+    banked = pairs.isin([(year, subject) for year, subject, _ in BANK_MODULES])
+    offered = pairs.isin([(year, subject) for year, subject, key_variant in BANK_MODULES
+                          if key_variant == variant])
+    return offered | ~banked
+
+def generate_comments_all_variants(df, variants=None, salt=""):
+    """
+    Generate every variant for every row in one pass.
+
+    Column parsing, pronoun resolution and band snapping are done once and
+    shared by the variants; each comment is the one generate_comments_batch
+    gives for that variant. variants defaults to every variant in any bank;
+    a row only gets the variants its Year/Subject has (see
+    rows_for_variant), and the others are None without an error.
+
+    Returns (comments, errors): a DataFrame aligned to df.index with one
+    column per variant (None where it failed or has no bank), and a dict
+    mapping each variant to its {index label: message} errors.
+    """
+    variants = list(variants or bank_variants())
+    inputs = _batch_inputs(df)
+    columns, all_errors = {}, {}
+    for variant in variants:
+        comments = [None] * len(df)
+        errors = {}
+        for group in _batch_groups(df, variant, errors, inputs):
+            _render_group(*group, salt, comments)
+        wanted = rows_for_variant(df, variant)
+        columns[variant] = comments
+        all_errors[variant] = {df.index[position]: message for position, message in sorted(errors.items())
+                               if wanted[position]}
+    return pd.DataFrame(columns, index=df.index, columns=variants, dtype=object), all_errors
+
+# ========== UPLOAD VALIDATION ==========
+SCORE_RANGE = (0, 100)  # raw marks outside this are off-band rather than snapped
+VALIDATION_COLUMNS = ['Row', 'Student Name', 'Column', 'Problem']
+
+def validate_upload(df, seen=None):
+    """
+    Check a parsed upload with column-wise masks before any generation.
+
+    Flags missing names, unknown subjects, years without banks, missing or
+    off-band scores (outside SCORE_RANGE), Year/Subject/Variant combinations
+    without a bank, and repeats of a student (name, subject, year) already
+    in the upload. seen, a set, carries student keys between chunks of one
+    file and is updated in place.
+
+    Returns (clean, errors): the rows with no problems, and a DataFrame
+    with VALIDATION_COLUMNS holding one row per problem. Row is the
+    1-based row number taken from df.index.
+    """
+    names = _batch_column(df, 'Student Name', '').fillna('').astype(str).str.strip()
+    subjects = _batch_column(df, 'Subject', 'English').astype(object).fillna('').astype(str)
+    years = pd.to_numeric(_batch_column(df, 'Year', 7), errors='coerce')
+    known_subject = subjects.isin(bank_subjects())
+    known_year = years.isin(bank_years())
+    whole_years = years.fillna(-1).astype(int)
+
+    checks = [
+        (names == '', 'Student Name', "Name is missing"),
+        (~known_subject, 'Subject', f"Subject must be one of {', '.join(bank_subjects())}"),
+        (~known_year, 'Year', f"Year must be one of {', '.join(map(str, bank_years()))}"),
+    ]
+    low, high = SCORE_RANGE
+    for column in BATCH_SCORE_COLUMNS:
+        scores = pd.to_numeric(_batch_column(df, column, 75), errors='coerce')
+        checks.append((scores.isna(), column, f"{column} is missing or not a number"))
+        checks.append((((scores < low) | (scores > high)).fillna(False), column,
+                      f"{column} must be between {low} and {high}"))
+
+    bank_pairs = pd.MultiIndex.from_tuples([(year, subject) for year, subject, _ in BANK_MODULES])
+    has_bank = pd.Series(pd.MultiIndex.from_arrays([whole_years, subjects]).isin(bank_pairs))
+    checks.append((known_year & known_subject & ~has_bank, 'Year', "No statement bank for this Year and Subject"))
+    if 'Variant' in df.columns:
+        variants = pd.to_numeric(_batch_column(df, 'Variant', None), errors='coerce')
+        has_variant = pd.Series(pd.MultiIndex.from_arrays(
+            [whole_years, subjects, variants.fillna(-1).astype(int)]).isin(list(BANK_MODULES)))
+        checks.append((has_bank & variants.notna() & ~has_variant, 'Variant',
+                       "No bank for this Variant of the Year and Subject"))
+
+    students = pd.MultiIndex.from_arrays([names.str.lower(), subjects, whole_years])
+    repeated = students.duplicated()
+    if seen:
+        repeated |= students.isin(list(seen))
+    checks.append((pd.Series(repeated) & (names != ''), 'Student Name',
+                   "Duplicate of an earlier row for this student"))
+    if seen is not None:
+        seen.update(students)
+
+    rows = df.index.to_numpy() + 1
+    failed = np.zeros(len(df), dtype=bool)
+    frames = []
+    for mask, column, problem in checks:
+        mask = mask.to_numpy(dtype=bool)
+        failed |= mask
+        if mask.any():
+            frames.append(pd.DataFrame({'Row': rows[mask], 'Student Name': names[mask].to_numpy(),
+                                        'Column': column, 'Problem': problem}))
+    errors = (pd.concat(frames, ignore_index=True).sort_values('Row', kind='stable', ignore_index=True)
+              if frames else pd.DataFrame(columns=VALIDATION_COLUMNS))
+    return df[~failed], errors
+
+# ========== UPLOAD INGESTION ==========
+# Turning an uploaded CSV into clean, typed, validated rows. Plain pandas,
+# so the app and the tests share it; the app only adds Streamlit messages.
+
+# Everything except letters, digits, spaces and . ' - (\w also matches "_")
+UNSAFE_INPUT_PATTERN = re.compile(r"[^\w .'-]|_")
+NAMES_SANITIZED = 'names_sanitized'  # DataFrame.attrs flag set by sanitize_name_column
+
+def sanitize_input(text, max_length=100):
+    """Sanitize user input to prevent injection attacks"""
+    if not text:
+        return ""
+    sanitized = UNSAFE_INPUT_PATTERN.sub('', text)
+    return sanitized[:max_length].strip().title()
+
+def sanitize_name_column(df, column='Student Name', max_length=100):
+    """
+    sanitize_input for a whole column in one vectorized pass. Missing names
+    become empty strings. The DataFrame is flagged as trusted so later
+    steps do not sanitize the names again.
+    """
+    if column in df.columns:
+        # object dtype keeps Python's str.strip/str.title, matching sanitize_input exactly
+        df[column] = (df[column].fillna('').astype(str).astype(object)
+                      .str.replace(UNSAFE_INPUT_PATTERN, '', regex=True)
+                      .str.slice(0, max_length).str.strip().str.title())
+    df.attrs[NAMES_SANITIZED] = True
+    return df
+
+# Upload schema. Text columns are parsed straight into these dtypes; numeric
+# columns are read as text and converted by apply_csv_schema, so a bad value
+# only fails its own cell and is reported against its column. Band columns
+# hold raw marks (72.5 is fine) until snap_band_columns turns them into bands.
+CSV_TEXT_DTYPES = {'Student Name': 'string', 'Gender': 'category', 'Subject': 'category'}
+CSV_INT_DTYPES = {'Year': 'Int8', 'Variant': 'Int8'}
+CSV_MARK_COLUMNS = ('Attitude', 'Achievement', 'Target')
+CSV_MARK_DTYPE = 'Float32'
+CSV_BAND_DTYPE = 'Int16'
+CSV_READ_DTYPES = {**CSV_TEXT_DTYPES,
+                   **{column: 'string' for column in [*CSV_INT_DTYPES, *CSV_MARK_COLUMNS]}}
+BAND_COLUMNS = {'Attitude': 'attitude', 'Achievement': 'achievement', 'Target': 'target'}
+
+def apply_csv_schema(df):
+    """
+    Convert the numeric columns of a parsed block: Year and Variant to
+    small nullable integers, band columns to float marks. Values that are
+    not numbers (or, for the integer columns, not whole numbers in range)
+    become missing.
+
+    Returns (df, problems), problems being an error table with
+    VALIDATION_COLUMNS and one row per cell that could not be read.
+    """
+    problems = []
+    columns = {**CSV_INT_DTYPES, **{column: CSV_MARK_DTYPE for column in CSV_MARK_COLUMNS}}
+    for column, dtype in columns.items():
+        if column not in df.columns:
+            continue
+        raw = df[column]
+        values = pd.to_numeric(raw.astype(object).str.strip(), errors='coerce')
+        if column in CSV_INT_DTYPES:
+            limits = np.iinfo(dtype.lower())
+            values = values.mask((values % 1 != 0) | (values < limits.min) | (values > limits.max))
+            problem = f"{column} is not a valid whole number"
+        else:
+            problem = f"{column} is not a number"
+        failed = (raw.notna() & values.isna()).to_numpy()
+        if failed.any():
+            problems.append(pd.DataFrame({'Row': df.index[failed] + 1,
+                                          'Student Name': df['Student Name'][failed].to_numpy()
+                                          if 'Student Name' in df.columns else '',
+                                          'Column': column, 'Problem': problem}))
+        df[column] = values.astype(dtype)
+    return df, (pd.concat(problems, ignore_index=True) if problems
+                else pd.DataFrame(columns=VALIDATION_COLUMNS))
+
+def snap_band_columns(df):
+    """
+    Snap raw marks in the band columns onto each Year/Subject's bands.
+
+    A row's variant may only be picked at generation time, so marks snap
+    onto the union of the bands of every variant for its Year/Subject.
+    Generation snaps again onto the chosen bank's bands, which gives the
+    same band as snapping the raw mark directly, since each bank's bands
+    are a subset of the union.
+    """
+    if 'Year' not in df.columns or 'Subject' not in df.columns:
+        return df
+    for (year, subject), rows in df.groupby(['Year', 'Subject'], observed=True).groups.items():
+        # validate_upload has already dropped rows with no bank
+        plans = [get_comment_plan(int(year), str(subject), variant)
+                 for variant in bank_variants(int(year), str(subject))]
+        for column, kind in BAND_COLUMNS.items():
+            if column not in df.columns or not plans:
+                continue
+            bands = _band_union([plan['bands'][kind] for plan in plans])
+            scores = pd.to_numeric(df.loc[rows, column], errors='coerce').dropna()
+            df.loc[scores.index, column] = snap_scores(bands, scores)
+    return df
+
+def clean_upload_chunk(df, seen=None):
+    """
+    Sanitize, type and validate one parsed block of an upload.
+    Returns (clean rows with snapped bands, error table). A cell that could
+    not be read is reported once, by apply_csv_schema, and its row skipped.
+    """
+    df, problems = apply_csv_schema(sanitize_name_column(df))
+    clean, errors = validate_upload(df, seen)
+    if len(problems):
+        clean = clean[~clean.index.isin(problems['Row'] - 1)]
+        errors = (pd.concat([problems, errors], ignore_index=True)
+                  .drop_duplicates(['Row', 'Column'])
+                  .sort_values('Row', kind='stable', ignore_index=True))
+    clean = snap_band_columns(clean)
+    for column in CSV_MARK_COLUMNS:
+        if column in clean.columns:
+            clean[column] = clean[column].astype(CSV_BAND_DTYPE)
+    return clean, errors
+
+def iter_csv_chunks(data, max_rows, chunk_rows=500, dtype_backend="numpy_nullable"):
+    """
+    Stream CSV bytes from memory in blocks of chunk_rows rows, stopping at
+    max_rows. Yields (clean rows, validation errors, rows read, whether rows
+    past the limit were dropped) per block. Duplicate students are caught
+    across blocks. Nothing is written to disk.
+    """
+    rows = 0
+    seen = set()
+    # Parse from the upload's bytes in memory rather than a temp file
+    with io.BytesIO(data) as buffer:
+        for chunk in pd.read_csv(buffer, chunksize=chunk_rows, nrows=max_rows + 1,
+                                 dtype=CSV_READ_DTYPES, dtype_backend=dtype_backend):
+            truncated = rows + len(chunk) > max_rows
+            if truncated:
+                chunk = chunk.head(max_rows - rows)
+            rows += len(chunk)
+            if len(chunk) or truncated:
+                clean, errors = clean_upload_chunk(chunk, seen)
+                yield clean, errors, rows, truncated
+
+def read_upload(data, max_rows, preview_rows=5, **options):
+    """
+    Validate a whole upload with iter_csv_chunks (options are passed on)
+    without keeping its rows: only one block is in memory at a time.
+    Returns (the first preview_rows clean rows, rows read, error table,
+    truncated).
+    """
+    rows, truncated, previews, tables = 0, False, [], []
+    for clean, errors, rows, truncated in iter_csv_chunks(data, max_rows, **options):
+        shown = sum(map(len, previews))
+        if shown < preview_rows:
+            previews.append(clean.head(preview_rows - shown))
+        if len(errors):
+            tables.append(errors)
+    preview = pd.concat(previews) if previews else pd.DataFrame()
+    errors = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=VALIDATION_COLUMNS)
+    return preview, rows, errors, truncated
+
+# ========== N-BEST CANDIDATES ==========
+LENGTH_WEIGHT = 1.0       # per character short of TARGET_CHARS
+TRUNCATION_PENALTY = 500.0
+DIVERSITY_WEIGHT = 100.0  # per unit share of the class already using the phrase
+
+def score_candidates(lengths, openings, closers, n_openings, n_closers):
+    """
+    Score an (n, k) grid of candidates from their lengths and phrase indices.
+
+    Higher is better: candidates lose LENGTH_WEIGHT per character short of
+    TARGET_CHARS, TRUNCATION_PENALTY if they would be truncated, and
+    DIVERSITY_WEIGHT times the share of the class's candidates that use
+    the same opening or closer, so common phrases are spread out.
+    """
+    truncated = lengths > TARGET_CHARS
+    score = -LENGTH_WEIGHT * np.abs(TARGET_CHARS - lengths) - TRUNCATION_PENALTY * truncated
+    if openings.size:
+        opening_share = np.bincount(openings.ravel(), minlength=n_openings) / openings.size
+        closer_share = np.bincount(closers.ravel(), minlength=n_closers) / closers.size
+        score -= DIVERSITY_WEIGHT * (opening_share[openings] + closer_share[closers])
+    return score
+
+def generate_comment_candidates(df, variant=1, salt="", candidates=8, top=1):
+    """
+    Draw candidates comments per row and keep the top best-scoring ones.
+
+    Candidate d of a row is the pair render_comment would pick with draw=d,
+    so the first candidate is the generate_comments_batch comment. Only
+    lengths and phrase indices are scored (see score_candidates), with
+    rows sharing a Year and Subject treated as one class; just the kept
+    candidates are rendered.
+
+    Returns (comments, errors) like generate_comments_batch, except that
+    comments is a DataFrame with columns 1..top in rank order.
+    """
+    top = max(1, min(top, candidates))
+    comments = np.full((len(df), top), None, dtype=object)
+    errors = {}
+
+    for plan, plan_groups in _batch_classes(df, variant, errors):
+        head_lengths, closer_lengths = _phrase_lengths(plan)
+        rows, fixed, pairs = [], [], []
+        for _, bands, pronouns, members, names in plan_groups:
+            skeleton_length = _skeleton_length(plan['templates'][pronouns], *bands)
+            for position, name in zip(members, names):
+                fixed_length = skeleton_length + len(name)
+                rows.append((position, name, bands, pronouns))
+                fixed.append(fixed_length)
+                pairs.append([_choose_indices(plan, student_seed(plan['key'], name, *bands, pronouns,
+                                                                 salt=salt, draw=draw), fixed_length)
+                              for draw in range(candidates)])
+
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(len(rows), candidates, 2)
+        openings, closers = pairs[..., 0], pairs[..., 1]
+        lengths = np.asarray(fixed, dtype=np.int64)[:, None] + head_lengths[openings] + closer_lengths[closers]
+        score = score_candidates(lengths, openings, closers, len(head_lengths), len(closer_lengths))
+        ranked = np.argsort(-score, axis=1, kind='stable')[:, :top]
+
+        for row, (position, name, bands, pronouns) in enumerate(rows):
+            template = plan['templates'][pronouns]
+            for rank, candidate in enumerate(ranked[row]):
+                head, sentences = _render_skeleton(plan, template, *bands, *pairs[row, candidate])
+                comments[position, rank] = _finish_comment(f"{head}{name}{sentences[0]}", sentences[1:])
+
+    errors = {df.index[position]: message for position, message in sorted(errors.items())}
+    return pd.DataFrame(comments, index=df.index, columns=range(1, top + 1)), errors
+
+# ========== PARALLEL BATCH GENERATION ==========
+# Spawning, importing and preloading each worker costs seconds, so below this
+# the pool loses to one process even on four cores (see bench-parallel).
+# Uploads in the app are far smaller and always run in-process.
+PARALLEL_MIN_ROWS = 200000
+CHUNK_TARGET_SECONDS = 0.5
+MIN_CHUNK_ROWS = 500
+MAX_CHUNK_ROWS = 50000
+
+def _preload_plans(keys):
+    """Worker initializer: load the snapshot or compile the banks once per process"""
+    load_plan_snapshot(rebuild=False)
+    for key in keys:
+        get_comment_plan(*key)
+
+def _generate_chunk(chunk, variant, salt, sampling="row", start=0):
+    if sampling != "row":
+        salt = f"{salt}/{start}"  # bulk draws are per chunk; keep chunks from dealing alike
+    return generate_comments_batch(chunk, variant, salt, sampling)
+
+def _slice_variant(variant, start, stop):
+    return variant if np.ndim(variant) == 0 else variant.iloc[start:stop]
+
+def _chunk_rows(seconds_per_row, remaining, workers):
+    rows = int(CHUNK_TARGET_SECONDS / max(seconds_per_row, 1e-9))
+    rows = min(rows, -(-remaining // workers))  # every worker gets at least one chunk
+    return max(MIN_CHUNK_ROWS, min(rows, MAX_CHUNK_ROWS))
+
+def generate_comments_parallel(df, variant=1, salt="", workers=None, progress=None, sampling="row"):
+    """
+    generate_comments_batch sharded across a process pool.
+
+    A pilot chunk runs in-process to measure the per-row cost, which sets
+    the chunk size for the rest. Results are merged back in input order
+    and, with the default "row" sampling, match the in-process output.
+    progress, if given, is called as progress(rows_done, total_rows).
+    """
+    total = len(df)
+    workers = workers or os.cpu_count() or 1
+    if total < PARALLEL_MIN_ROWS or workers < 2:
+        result = generate_comments_batch(df, variant, salt, sampling)
+        if progress:
+            progress(total, total)
+        return result
+
+    if np.ndim(variant):
+        variant = _batch_variants(df, variant)
+    pilot_rows = MIN_CHUNK_ROWS
+    started = time.perf_counter()
+    results = [_generate_chunk(df.iloc[:pilot_rows], _slice_variant(variant, 0, pilot_rows), salt, sampling)]
+    seconds_per_row = (time.perf_counter() - started) / pilot_rows
+    done = pilot_rows
+    if progress:
+        progress(done, total)
+
+    chunk_rows = _chunk_rows(seconds_per_row, total - pilot_rows, workers)
+    starts = range(pilot_rows, total, chunk_rows)
+    results.extend([None] * len(starts))
+    plan_keys = [key for key in BANK_MODULES if np.ndim(variant) or key[2] == variant]
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_preload_plans, initargs=(plan_keys,)) as pool:
+        futures = {}
+        for slot, start in enumerate(starts, 1):
+            chunk = df.iloc[start:start + chunk_rows]
+            futures[pool.submit(_generate_chunk, chunk, _slice_variant(variant, start, start + chunk_rows),
+                                salt, sampling, start)] = (slot, len(chunk))
+        for future in as_completed(futures):
+            slot, rows = futures[future]
+            results[slot] = future.result()
+            done += rows
+            if progress:
+                progress(done, total)
+
+    errors = {}
+    for _, chunk_errors in results:
+        errors.update(chunk_errors)
+    return pd.concat([comments for comments, _ in results]), errors
+
+# ========== COMMENT SPACE ==========
+def iter_comment_space(year, subject, variant=1, name="Student", attitude_target=""):
+    """
+    Lazily yield every comment a bank can produce, untruncated:
+    (att, achieve, target, pronouns, opening_idx, closer_idx, comment)
+    for every band triple x pronoun set x opening x closer.
+    """
+    plan = get_comment_plan(year, subject, variant)
+    bands = plan['bands']
+    attitude_target_sentence = _attitude_target_sentence(attitude_target)
+    for pronouns in PRONOUN_SETS:
+        template = plan['templates'][pronouns]
+        for att in bands['attitude']:
+            for achieve in bands['achievement']:
+                for target in bands['target']:
+                    for opening_idx in range(len(plan['openings'])):
+                        for closer_idx in range(len(plan['closers'])):
+                            head, sentences = _render_skeleton(plan, template, att, achieve, target,
+                                                               opening_idx, closer_idx)
+                            comment = _finish_comment(f"{head}{name}{sentences[0]}",
+                                                      (*sentences[1:], attitude_target_sentence),
+                                                      target=sys.maxsize)
+                            yield att, achieve, target, pronouns, opening_idx, closer_idx, comment
+
+def comment_space_stats(year, subject, variant=1, name="Student", attitude_target="", bin_width=50):
+    """
+    Length statistics over iter_comment_space against TARGET_CHARS, in
+    constant memory. always_truncated lists the (att, achieve, target,
+    pronouns) combinations for which no opening/closer pair fits.
+    """
+    count = total = longest = over = 0
+    histogram = {}
+    fits = {}
+    for att, achieve, target, pronouns, _, _, comment in iter_comment_space(
+            year, subject, variant, name, attitude_target):
+        length = len(comment)
+        count += 1
+        total += length
+        longest = max(longest, length)
+        over += length > TARGET_CHARS
+        bucket = length // bin_width * bin_width
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+        combination = (att, achieve, target, pronouns)
+        fits[combination] = fits.get(combination, False) or length <= TARGET_CHARS
+    return {
+        'comments': count,
+        'max': longest,
+        'mean': total / count if count else 0.0,
+        'over_target': over,
+        'histogram': dict(sorted(histogram.items())),
+        'always_truncated': [combination for combination, fit in fits.items() if not fit],
+    }
+
+# ========== SKELETON LOOKUP TABLE ==========
+# Binary layout: magic, version, header length, JSON header, one uint64
+# offset per entry (+1), then the UTF-8 skeletons. Each skeleton is the
+# opening head followed by its sentences, separated by newlines. Entries
+# of a plan are laid out densely by (att, achieve, target, pronouns,
+# opening, closer) position so a lookup is pure arithmetic.
+COMMENT_TABLE_PATH = os.path.join(BANK_DIR, "comment_table.bin")
+COMMENT_TABLE_MAGIC = b"RCSK"
+COMMENT_TABLE_VERSION = 1
+_TABLE_PREFIX = struct.Struct('<4sII')
+_PRONOUN_POSITIONS = {pronouns: position for position, pronouns in enumerate(PRONOUN_SETS)}
+
+def _table_dimensions(plan):
+    bands = plan['bands']
+    return (len(bands['attitude']), len(bands['achievement']), len(bands['target']),
+            len(PRONOUN_SETS), len(plan['openings']), len(plan['closers']))
+
+def build_comment_table(path=COMMENT_TABLE_PATH, keys=None):
+    """Write every name-free skeleton of the given banks (default: all) to path"""
+    keys = sorted(keys or BANK_MODULES)
+    header = {'plans': [], 'entries': 0, 'source_hash': bank_source_hash()}
+    for key in keys:
+        plan = get_comment_plan(*key)
+        header['plans'].append({
+            'key': list(key),
+            'base': header['entries'],
+            'bands': {kind: list(bands) for kind, bands in plan['bands'].items()},
+            'openings': len(plan['openings']),
+            'closers': len(plan['closers']),
+        })
+        header['entries'] += math.prod(_table_dimensions(plan))
+    header_bytes = json.dumps(header).encode()
+    offsets = array('Q', [0])
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as out:
+        out.write(_TABLE_PREFIX.pack(COMMENT_TABLE_MAGIC, COMMENT_TABLE_VERSION, len(header_bytes)))
+        out.write(header_bytes)
+        offsets_at = out.tell()
+        out.seek(offsets_at + 8 * (header['entries'] + 1))
+        for key in keys:
+            plan = get_comment_plan(*key)
+            bands = plan['bands']
+            for att in bands['attitude']:
+                for achieve in bands['achievement']:
+                    for target in bands['target']:
+                        for pronouns in PRONOUN_SETS:
+                            template = plan['templates'][pronouns]
+                            for opening_idx in range(len(plan['openings'])):
+                                for closer_idx in range(len(plan['closers'])):
+                                    head, sentences = _render_skeleton(plan, template, att, achieve, target,
+                                                                       opening_idx, closer_idx)
+                                    data = "\n".join((head, *sentences)).encode()
+                                    out.write(data)
+                                    offsets.append(offsets[-1] + len(data))
+        out.seek(offsets_at)
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        offsets.tofile(out)
+    os.replace(temp_path, path)
+    return header['entries']
+
+class SkeletonTable:
+    """
+    Read-only skeleton lookup over a file from build_comment_table. The file
+    is memory-mapped, so every process serving the app shares its pages.
+    get() has the same key and result as SkeletonCache.get(). Compare
+    source_hash with bank_source_hash() to detect a stale table.
+    """
+
+    def __init__(self, path=COMMENT_TABLE_PATH):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_length = _TABLE_PREFIX.unpack_from(self._mmap, 0)
+        if magic != COMMENT_TABLE_MAGIC or version != COMMENT_TABLE_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {COMMENT_TABLE_VERSION} comment table")
+        header_at = _TABLE_PREFIX.size
+        header = json.loads(self._mmap[header_at:header_at + header_length])
+        self.source_hash = header.get('source_hash')
+        offsets_at = header_at + header_length
+        self._offsets = np.frombuffer(self._mmap, dtype='<u8', count=header['entries'] + 1,
+                                      offset=offsets_at)
+        self._blob_at = offsets_at + self._offsets.nbytes
+        self._plans = {}
+        for entry in header['plans']:
+            bands = entry['bands']
+            self._plans[tuple(entry['key'])] = (
+                entry['base'],
+                *({band: position for position, band in enumerate(bands[kind])}
+                  for kind in ('attitude', 'achievement', 'target')),
+                entry['openings'],
+                entry['closers'],
+            )
+
+    def get(self, key):
+        plan_key, att, achieve, target, pronouns, opening_idx, closer_idx = key
+        entry = self._plans.get(plan_key)
+        pronoun_position = _PRONOUN_POSITIONS.get(pronouns)
+        if entry is None or pronoun_position is None:
+            return None
+        base, attitude_positions, achievement_positions, target_positions, openings, closers = entry
+        try:
+            position = attitude_positions[att]
+            position = position * len(achievement_positions) + achievement_positions[achieve]
+            position = position * len(target_positions) + target_positions[target]
+        except KeyError:
+            return None
+        position = ((position * len(PRONOUN_SETS) + pronoun_position) * openings + opening_idx) * closers + closer_idx
+        start, end = self._offsets[base + position:base + position + 2]
+        head, *sentences = self._mmap[self._blob_at + int(start):self._blob_at + int(end)].decode().split("\n")
+        return head, tuple(sentences)
+
+    def close(self):
+        self._offsets = None
+        self._mmap.close()
+
+# ========== COMMAND LINE ==========
+def _legacy_fix_pronouns(text, pronoun, possessive):
+    """The previous eight-pass rewriter, kept for bench-pronouns and the tests"""
+    if not text:
+        return text
+    text = re.sub(r'\bhe\b', pronoun, text, flags=re.IGNORECASE)
+    text = re.sub(r'\bHe\b', pronoun.capitalize(), text)
+    text = re.sub(r'\bhis\b', possessive, text, flags=re.IGNORECASE)
+    text = re.sub(r'\bHis\b', possessive.capitalize(), text)
+    text = re.sub(r'\bhim\b', pronoun, text, flags=re.IGNORECASE)
+    text = re.sub(r'\bHim\b', pronoun.capitalize(), text)
+    text = re.sub(r'\bhimself\b', f"{pronoun}self", text, flags=re.IGNORECASE)
+    text = re.sub(r'\bherself\b', f"{pronoun}self", text, flags=re.IGNORECASE)
+    return text
+
+def _bank_texts():
+    texts = []
+    for year, subject, variant in BANK_MODULES:
+        plan = get_comment_plan(year, subject, variant)
+        texts.extend(plan['attitude'].values())
+        for _, bank in plan['achievement'] + plan['targets']:
+            texts.extend(bank.values())
+    return texts
+
+def bench_pronouns(rounds=20):
+    """Time the single-pass rewriter against the legacy chain and check they agree"""
+    import timeit
+
+    # The legacy chain is only correct for lower-case "he" and "his"
+    texts = [f"{text}, and he showed his working" for text in _bank_texts()]
+    for pronouns in PRONOUN_SETS:
+        for text in texts:
+            if fix_pronouns_in_text(text, *pronouns) != _legacy_fix_pronouns(text, *pronouns):
+                raise AssertionError(f"Rewriters disagree for {pronouns}: {text!r}")
+    print(f"Identical output on {len(texts) * len(PRONOUN_SETS)} texts")
+
+    def run(rewrite):
+        for pronouns in PRONOUN_SETS:
+            for text in texts:
+                rewrite(text, *pronouns)
+
+    legacy = min(timeit.repeat(lambda: run(_legacy_fix_pronouns), number=1, repeat=rounds))
+    single = min(timeit.repeat(lambda: run(fix_pronouns_in_text), number=1, repeat=rounds))
+    print(f"legacy: {legacy * 1000:.2f} ms  single-pass: {single * 1000:.2f} ms  "
+          f"speed-up: {legacy / single:.1f}x")
+
+def _bench_students(rows, seed=1):
+    """Synthetic marks spread over every discovered year and subject"""
+    rng = np.random.default_rng(seed)
+    pairs = sorted({(year, subject) for year, subject, _ in BANK_MODULES})
+    picks = rng.integers(0, len(pairs), rows)
+    return pd.DataFrame({
+        'Student Name': [f"Student{i}" for i in range(rows)],
+        'Gender': rng.choice(["Male", "Female", "Other"], rows),
+        'Subject': [pairs[pick][1] for pick in picks],
+        'Year': [pairs[pick][0] for pick in picks],
+        'Attitude': rng.integers(40, 100, rows),
+        'Achievement': rng.integers(0, 100, rows),
+        'Target': rng.integers(0, 100, rows),
+    })
+
+def bench_parallel(rows=None, workers=None):
+    """Time the process pool against one process at PARALLEL_MIN_ROWS and check they agree"""
+    global PARALLEL_MIN_ROWS
+    import time
+
+    rows = rows or PARALLEL_MIN_ROWS
+    workers = workers or os.cpu_count() or 1
+    df = _bench_students(rows)
+    variants = assign_variants(df, salt="bench")
+
+    start = time.perf_counter()
+    expected, expected_errors = generate_comments_batch(df, variants, "bench")
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    threshold, PARALLEL_MIN_ROWS = PARALLEL_MIN_ROWS, 0  # time the pool even below the threshold
+    try:
+        comments, errors = generate_comments_parallel(df, variants, "bench", workers=workers)
+    finally:
+        PARALLEL_MIN_ROWS = threshold
+    pooled = time.perf_counter() - start
+
+    if not comments.equals(expected) or errors != expected_errors:
+        raise AssertionError("Process pool output differs from in-process output")
+    print(f"{rows} rows  in-process: {single:.2f} s  {workers} workers: {pooled:.2f} s  "
+          f"speed-up: {single / pooled:.1f}x")
+    return single, pooled
+
+def _key_matches(key, year=None, subject=None, variant=None):
+    return all(wanted is None or wanted == actual
+               for wanted, actual in zip((year, subject, variant), key))
+
+def print_comment_space(year=None, subject=None, variant=None, name="Student", bin_width=50):
+    for key in sorted(BANK_MODULES):
+        if not _key_matches(key, year, subject, variant):
+            continue
+        stats = comment_space_stats(*key, name=name, bin_width=bin_width)
+        print(f"Year {key[0]} {key[1]} variant {key[2]}: {stats['comments']} comments, "
+              f"max {stats['max']}, mean {stats['mean']:.1f}, "
+              f"{stats['over_target']} over {TARGET_CHARS}, "
+              f"{len(stats['always_truncated'])} band/pronoun combinations always truncated")
+        for bucket, bucket_count in stats['histogram'].items():
+            marker = " *" if bucket + bin_width > TARGET_CHARS + 1 else ""
+            print(f"  {bucket:>4}-{bucket + bin_width - 1:<4} {bucket_count:>7}{marker}")
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report comment engine tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("bench-pronouns", help="benchmark the pronoun rewriter")
+    bench.add_argument("--rounds", type=int, default=20)
+    space = commands.add_parser("comment-space", help="length statistics over every possible comment")
+    space.add_argument("--year", type=int)
+    space.add_argument("--subject")
+    space.add_argument("--variant", type=int)
+    space.add_argument("--name", default="Student", help="name used for length purposes")
+    space.add_argument("--bin-width", type=int, default=50)
+
+    table = commands.add_parser("build-table", help="write the memory-mapped skeleton lookup table")
+    table.add_argument("--output", default=COMMENT_TABLE_PATH)
+    table.add_argument("--year", type=int)
+    table.add_argument("--subject")
+    table.add_argument("--variant", type=int)
+
+    commands.add_parser("build-snapshot", help="write the compiled statement-bank snapshot")
+
+    parallel = commands.add_parser("bench-parallel",
+                                   help="time the process pool against one process at PARALLEL_MIN_ROWS")
+    parallel.add_argument("--rows", type=int)
+    parallel.add_argument("--workers", type=int)
+
+    args = parser.parse_args(argv)
+    if args.command == "bench-pronouns":
+        bench_pronouns(args.rounds)
+    elif args.command == "comment-space":
+        print_comment_space(args.year, args.subject, args.variant, args.name, args.bin_width)
+    elif args.command == "build-table":
+        keys = [key for key in BANK_MODULES if _key_matches(key, args.year, args.subject, args.variant)]
+        entries = build_comment_table(args.output, keys)
+        print(f"Wrote {entries} skeletons for {len(keys)} banks to {args.output}")
+    elif args.command == "build-snapshot":
+        plans = build_plan_snapshot()
+        print(f"Wrote {plans} compiled banks to {PLAN_SNAPSHOT_PATH}")
+        for module_name, reason in SKIPPED_BANKS.items():
+            print(f"Skipped {module_name}: {reason}")
+    elif args.command == "bench-parallel":
+        bench_parallel(args.rows, args.workers)
+
+if __name__ == "__main__":
+    main()
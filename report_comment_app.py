@@ -3,15 +3,14 @@
 # Supports Year 5, 7 & 8; Subjects: English, Maths, Science
 # =========================================
 
-import random
 import streamlit as st
-import tempfile
 import os
-import time
-from datetime import datetime, timedelta
+import importlib.util
+from datetime import datetime
 import pandas as pd
 import io
-import re
+import hashlib
+import secrets
 
 # ========== DOCX IMPORT WITH FALLBACK ==========
 try:
@@ -21,10 +20,18 @@ except ImportError:
     DOCX_AVAILABLE = False
     Document = None
 
+# ========== PYARROW (OPTIONAL) ==========
+# Only enables the Arrow dtype backend for uploads, so check without importing it
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
 # ========== SECURITY & PRIVACY SETTINGS ==========
-TARGET_CHARS = 499
 MAX_FILE_SIZE_MB = 5
-MAX_ROWS_PER_UPLOAD = 100
+MAX_ROWS_PER_UPLOAD = int(os.environ.get("MAX_ROWS_PER_UPLOAD", 5000))  # safety limit per upload
+CSV_CHUNK_ROWS = 500  # uploads are read and generated this many rows at a time
+CSV_DTYPE_BACKEND = "pyarrow" if PYARROW_AVAILABLE else "numpy_nullable"
+COMMENT_CACHE_MAX_MB = 16
+COMMENT_CACHE_TTL_HOURS = 6
+ALTERNATIVES_PER_VARIANT = 4  # comments precomputed per variant for Regenerate
 
 # ========== PAGE CONFIGURATION ==========
 st.set_page_config(
@@ -41,201 +48,49 @@ if 'app_initialized' not in st.session_state:
     st.session_state.upload_count = 0
     st.session_state.last_upload_time = datetime.now()
     st.session_state.generated_files = []
+    st.session_state.seed_salt = secrets.token_hex(8)
 
-# ========== IMPORT STATEMENTS FROM VARIANT FILES ==========
+# ========== LOAD COMMENT ENGINE ==========
 try:
-    # Year 5 English - Use variant1 as default
-    from statements_year5_English_variant1 import (
-        opening_phrases as opening_5_eng,
-        attitude_bank as attitude_5_eng,
-        reading_bank as reading_5_eng,
-        writing_bank as writing_5_eng,
-        reading_target_bank as target_5_eng,
-        writing_target_bank as target_write_5_eng,
-        closer_bank as closer_5_eng
-    )
-
-    # Year 5 English variant2
-    from statements_year5_English_variant2 import (
-        opening_phrases as opening_5_eng_v2,
-        attitude_bank as attitude_5_eng_v2,
-        reading_bank as reading_5_eng_v2,
-        writing_bank as writing_5_eng_v2,
-        reading_target_bank as target_5_eng_v2,
-        writing_target_bank as target_write_5_eng_v2,
-        closer_bank as closer_5_eng_v2
-    )
-
-    # Year 5 Maths - Use variant1 as default
-    from statements_year5_Maths_variant1 import (
-        opening_phrases as opening_5_maths,
-        attitude_bank as attitude_5_maths,
-        number_bank as number_5_maths,
-        problem_solving_bank as problem_5_maths,
-        target_bank as target_5_maths,
-        closer_bank as closer_5_maths
-    )
-
-    # Year 5 Maths variant2
-    from statements_year5_Maths_variant2 import (
-        opening_phrases as opening_5_maths_v2,
-        attitude_bank as attitude_5_maths_v2,
-        number_bank as number_5_maths_v2,
-        problem_solving_bank as problem_5_maths_v2,
-        target_bank as target_5_maths_v2,
-        closer_bank as closer_5_maths_v2
-    )
-
-    # Year 5 Science - Use variant1 as default
-    from statements_year5_Science_variant1 import (
-        opening_phrases as opening_5_sci,
-        attitude_bank as attitude_5_sci,
-        science_bank as science_5_sci,
-        target_bank as target_5_sci,
-        closer_bank as closer_5_sci
-    )
-
-    # Year 5 Science variant2
-    from statements_year5_Science_variant2 import (
-        opening_phrases as opening_5_sci_v2,
-        attitude_bank as attitude_5_sci_v2,
-        science_bank as science_5_sci_v2,
-        target_bank as target_5_sci_v2,
-        closer_bank as closer_5_sci_v2
-    )
-
-    # Year 7 English - Use variant1 as default
-    from statements_year7_English_variant1 import (
-        opening_phrases as opening_7_eng,
-        attitude_bank as attitude_7_eng,
-        reading_bank as reading_7_eng,
-        writing_bank as writing_7_eng,
-        reading_target_bank as target_7_eng,
-        writing_target_bank as target_write_7_eng,
-        closer_bank as closer_7_eng
-    )
-
-    # Year 7 English variant2
-    from statements_year7_English_variant2 import (
-        opening_phrases as opening_7_eng_v2,
-        attitude_bank as attitude_7_eng_v2,
-        reading_bank as reading_7_eng_v2,
-        writing_bank as writing_7_eng_v2,
-        reading_target_bank as target_7_eng_v2,
-        writing_target_bank as target_write_7_eng_v2,
-        closer_bank as closer_7_eng_v2
-    )
-
-    # Year 7 Maths - Use variant1 as default
-    from statements_year7_Maths_variant1 import (
-        opening_phrases as opening_7_maths,
-        attitude_bank as attitude_7_maths,
-        number_and_algebra_bank as number_7_maths,
-        geometry_and_measurement_bank as geometry_7_maths,
-        problem_solving_and_reasoning_bank as problem_7_maths,
-        target_bank as target_7_maths,
-        closer_bank as closer_7_maths
-    )
-
-    # Year 7 Maths variant2
-    from statements_year7_Maths_variant2 import (
-        opening_phrases as opening_7_maths_v2,
-        attitude_bank as attitude_7_maths_v2,
-        number_and_algebra_bank as number_7_maths_v2,
-        geometry_and_measurement_bank as geometry_7_maths_v2,
-        problem_solving_and_reasoning_bank as problem_7_maths_v2,
-        target_bank as target_7_maths_v2,
-        closer_bank as closer_7_maths_v2
-    )
-
-    # Year 7 Science - Use variant1 as default
-    from statements_year7_science_variant1 import (
-        opening_phrases as opening_7_sci,
-        attitude_bank as attitude_7_sci,
-        science_bank as science_7_sci,
-        target_bank as target_7_sci,
-        closer_bank as closer_7_sci
-    )
-
-    # Year 7 Science variant2
-    from statements_year7_science_variant2 import (
-        opening_phrases as opening_7_sci_v2,
-        attitude_bank as attitude_7_sci_v2,
-        science_bank as science_7_sci_v2,
-        target_bank as target_7_sci_v2,
-        closer_bank as closer_7_sci_v2
-    )
-
-    # Year 8 English - Use variant1 as default
-    from statements_year8_English_variant1 import (
-        opening_phrases as opening_8_eng,
-        attitude_bank as attitude_8_eng,
-        reading_bank as reading_8_eng,
-        writing_bank as writing_8_eng,
-        reading_target_bank as target_8_eng,
-        writing_target_bank as target_write_8_eng,
-        closer_bank as closer_8_eng
+    from comment_engine import (
+        TARGET_CHARS,
+        bank_years,
+        bank_subjects,
+        bank_variants,
+        assign_variants,
+        generate_comments_all_variants,
+        rows_for_variant,
+        get_comment_plan,
+        render_comment_options,
+        generate_comments_batch,
+        generate_comment_candidates,
+        SkeletonCache,
+        SkeletonTable,
+        COMMENT_TABLE_PATH,
+        bank_source_hash,
+        load_plan_snapshot,
+        SKIPPED_BANKS,
+        VALIDATION_COLUMNS,
+        NAMES_SANITIZED,
+        sanitize_input,
+        sanitize_name_column,
+        read_upload,
+        iter_csv_chunks,
     )
-
-    # Year 8 English variant2
-    from statements_year8_English_variant2 import (
-        opening_phrases as opening_8_eng_v2,
-        attitude_bank as attitude_8_eng_v2,
-        reading_bank as reading_8_eng_v2,
-        writing_bank as writing_8_eng_v2,
-        reading_target_bank as target_8_eng_v2,
-        writing_target_bank as target_write_8_eng_v2,
-        closer_bank as closer_8_eng_v2
-    )
-
-    # Year 8 Maths - Use variant1 as default
-    from statements_year8_Maths_variant1 import (
-        opening_phrases as opening_8_maths,
-        attitude_bank as attitude_8_maths,
-        maths_bank as maths_8_maths,
-        target_bank as target_8_maths,
-        closer_bank as closer_8_maths
-    )
-
-    # Year 8 Maths variant2
-    from statements_year8_Maths_variant2 import (
-        opening_phrases as opening_8_maths_v2,
-        attitude_bank as attitude_8_maths_v2,
-        maths_bank as maths_8_maths_v2,
-        target_bank as target_8_maths_v2,
-        closer_bank as closer_8_maths_v2
-    )
-
-    # Year 8 Science - Use variant1 as default
-    from statements_year8_science_variant1 import (
-        opening_phrases as opening_8_sci,
-        attitude_bank as attitude_8_sci,
-        science_bank as science_8_sci,
-        target_bank as target_8_sci,
-        closer_bank as closer_8_sci
-    )
-
-    # Year 8 Science variant2
-    from statements_year8_science_variant2 import (
-        opening_phrases as opening_8_sci_v2,
-        attitude_bank as attitude_8_sci_v2,
-        science_bank as science_8_sci_v2,
-        target_bank as target_8_sci_v2,
-        closer_bank as closer_8_sci_v2
-    )
-
 except ImportError as e:
     st.error(f"Missing required statement files: {e}")
     st.stop()
 
-# ========== SECURITY FUNCTIONS ==========
-def sanitize_input(text, max_length=100):
-    """Sanitize user input to prevent injection attacks"""
-    if not text:
-        return ""
-    sanitized = ''.join(c for c in text if c.isalnum() or c in " .'-")
-    return sanitized[:max_length].strip().title()
+@st.cache_resource
+def load_statement_banks():
+    """Warm the plan cache from the compiled snapshot once per server process"""
+    return load_plan_snapshot()
+
+load_statement_banks()
+for module_name, reason in SKIPPED_BANKS.items():
+    st.warning(f"Statement bank {module_name} was skipped: {reason}")
 
+# ========== SECURITY FUNCTIONS ==========
 def validate_file(file):
     """Validate uploaded file size and type"""
     if file.size > MAX_FILE_SIZE_MB * 1024 * 1024:
@@ -244,28 +99,32 @@ def validate_file(file):
         return False, "Only CSV files allowed"
     return True, ""
 
-def process_csv_securely(uploaded_file):
-    """Process CSV with auto-cleanup of temp files"""
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.csv', mode='wb') as tmp:
-        tmp.write(uploaded_file.getvalue())
-        temp_path = tmp.name
+def read_csv_options():
+    """Keyword arguments for read_upload and iter_csv_chunks from the app settings"""
+    return {'chunk_rows': CSV_CHUNK_ROWS, 'dtype_backend': CSV_DTYPE_BACKEND}
 
-    try:
-        df = pd.read_csv(temp_path, nrows=MAX_ROWS_PER_UPLOAD + 1)
-        if len(df) > MAX_ROWS_PER_UPLOAD:
-            st.warning(f"Only processing first {MAX_ROWS_PER_UPLOAD} rows")
-            df = df.head(MAX_ROWS_PER_UPLOAD)
-        if 'Student Name' in df.columns:
-            df['Student Name'] = df['Student Name'].apply(lambda x: sanitize_input(str(x)))
-        return df
-    except Exception as e:
-        st.error(f"Error reading CSV: {e}")
-        return None
-    finally:
+def process_csv_securely(uploaded_file):
+    """
+    Validate the whole upload before anything is generated, one chunk at
+    a time. Returns (preview of the first clean rows, rows read, error
+    table), or None if the CSV cannot be read. Only that summary is kept
+    in session state, under a hash of the upload, so reruns reuse it
+    instead of parsing again; the rows themselves are never stored.
+    """
+    digest = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    cached = st.session_state.get('validated_upload')
+    if cached is None or cached[0] != digest:
         try:
-            os.unlink(temp_path)
-        except:
-            pass
+            cached = (digest, read_upload(uploaded_file.getvalue(), MAX_ROWS_PER_UPLOAD,
+                                          **read_csv_options()))
+        except Exception as e:
+            st.error(f"Error reading CSV: {e}")
+            return None
+        st.session_state.validated_upload = cached
+    preview, rows, errors, truncated = cached[1]
+    if truncated:
+        st.warning(f"Only processing first {MAX_ROWS_PER_UPLOAD} rows")
+    return preview, rows, errors
 
 # ========== HELPER FUNCTIONS ==========
 def get_pronouns(gender):
@@ -276,281 +135,130 @@ def get_pronouns(gender):
         return "she", "her"
     return "they", "their"
 
-def lowercase_first(text):
-    return text[0].lower() + text[1:] if text else ""
-
-def truncate_comment(comment, target=TARGET_CHARS):
-    if len(comment) <= target:
-        return comment
-    truncated = comment[:target].rstrip(" ,;.")
-    if "." in truncated:
-        truncated = truncated[:truncated.rfind(".")+1]
-    return truncated
-
-def fix_pronouns_in_text(text, pronoun, possessive):
-    """Fix gender pronouns in statement text using word boundaries"""
-    if not text:
-        return text
-
-    text = re.sub(r'\bhe\b', pronoun, text, flags=re.IGNORECASE)
-    text = re.sub(r'\bHe\b', pronoun.capitalize(), text)
-    text = re.sub(r'\bhis\b', possessive, text, flags=re.IGNORECASE)
-    text = re.sub(r'\bHis\b', possessive.capitalize(), text)
-    text = re.sub(r'\bhim\b', pronoun, text, flags=re.IGNORECASE)
-    text = re.sub(r'\bHim\b', pronoun.capitalize(), text)
-    text = re.sub(r'\bhimself\b', f"{pronoun}self", text, flags=re.IGNORECASE)
-    text = re.sub(r'\bherself\b', f"{pronoun}self", text, flags=re.IGNORECASE)
-
-    return text
-
 # ========== COMMENT GENERATOR ==========
-def generate_comment(subject, year, name, gender, att, achieve, target, pronouns, attitude_target=None, variant=1):
+@st.cache_resource
+def get_skeleton_cache():
+    """Process-wide cache of name-free comment skeletons, shared by all sessions"""
+    return SkeletonCache(max_bytes=COMMENT_CACHE_MAX_MB * 1024 * 1024,
+                         ttl_seconds=COMMENT_CACHE_TTL_HOURS * 3600)
+
+@st.cache_resource
+def get_skeleton_table():
+    """Memory-mapped skeleton table, if one was built with `python comment_engine.py build-table`"""
+    if not os.path.exists(COMMENT_TABLE_PATH):
+        return None
+    try:
+        table = SkeletonTable(COMMENT_TABLE_PATH)
+    except ValueError:
+        return None
+    if table.source_hash != bank_source_hash():
+        table.close()  # built from older banks; rebuild with build-table
+        return None
+    return table
+
+def generate_comment_options(subject, year, name, att, achieve, target, pronouns, attitude_target=None, variant=1, draw=0,
+                             name_trusted=False):
     """
-    Generate a report comment.
-    
-    Args:
-        variant (int): 1 = variant1 (default), 2 = variant2
+    Generate ALTERNATIVES_PER_VARIANT comments for one student, each with a
+    different opening and closer. The first matches render_comment().
     """
-    p, p_poss = pronouns
-    name = sanitize_input(name)
-
-    # Select statements based on variant
-    if variant == 1:
-        # Use variant1 (default)
-        if year == 5:
-            if subject == "English":
-                opening = random.choice(opening_5_eng)
-                attitude_text = fix_pronouns_in_text(attitude_5_eng[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(reading_5_eng[achieve], p, p_poss)
-                writing_text = fix_pronouns_in_text(writing_5_eng[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_5_eng[target], p, p_poss)
-                writing_target_text = fix_pronouns_in_text(target_write_5_eng[target], p, p_poss)
-                closer_sentence = random.choice(closer_5_eng)
-            elif subject == "Maths":
-                opening = random.choice(opening_5_maths)
-                attitude_text = fix_pronouns_in_text(attitude_5_maths[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(number_5_maths[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_5_maths[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_5_maths)
-            else:  # Science
-                opening = random.choice(opening_5_sci)
-                attitude_text = fix_pronouns_in_text(attitude_5_sci[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(science_5_sci[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_5_sci[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_5_sci)
-        
-        elif year == 7:
-            if subject == "English":
-                opening = random.choice(opening_7_eng)
-                attitude_text = fix_pronouns_in_text(attitude_7_eng[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(reading_7_eng[achieve], p, p_poss)
-                writing_text = fix_pronouns_in_text(writing_7_eng[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_7_eng[target], p, p_poss)
-                writing_target_text = fix_pronouns_in_text(target_write_7_eng[target], p, p_poss)
-                closer_sentence = random.choice(closer_7_eng)
-            elif subject == "Maths":
-                opening = random.choice(opening_7_maths)
-                attitude_text = fix_pronouns_in_text(attitude_7_maths[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(number_7_maths[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_7_maths[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_7_maths)
-            else:  # Science
-                opening = random.choice(opening_7_sci)
-                attitude_text = fix_pronouns_in_text(attitude_7_sci[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(science_7_sci[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_7_sci[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_7_sci)
-        
-        else:  # year == 8
-            if subject == "English":
-                opening = random.choice(opening_8_eng)
-                attitude_text = fix_pronouns_in_text(attitude_8_eng[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(reading_8_eng[achieve], p, p_poss)
-                writing_text = fix_pronouns_in_text(writing_8_eng[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_8_eng[target], p, p_poss)
-                writing_target_text = fix_pronouns_in_text(target_write_8_eng[target], p, p_poss)
-                closer_sentence = random.choice(closer_8_eng)
-            elif subject == "Maths":
-                opening = random.choice(opening_8_maths)
-                attitude_text = fix_pronouns_in_text(attitude_8_maths[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(maths_8_maths[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_8_maths[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_8_maths)
-            else:  # Science
-                opening = random.choice(opening_8_sci)
-                attitude_text = fix_pronouns_in_text(attitude_8_sci[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(science_8_sci[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_8_sci[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_8_sci)
-    
-    else:  # variant == 2
-        # Use variant2
-        if year == 5:
-            if subject == "English":
-                opening = random.choice(opening_5_eng_v2)
-                attitude_text = fix_pronouns_in_text(attitude_5_eng_v2[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(reading_5_eng_v2[achieve], p, p_poss)
-                writing_text = fix_pronouns_in_text(writing_5_eng_v2[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_5_eng_v2[target], p, p_poss)
-                writing_target_text = fix_pronouns_in_text(target_write_5_eng_v2[target], p, p_poss)
-                closer_sentence = random.choice(closer_5_eng_v2)
-            elif subject == "Maths":
-                opening = random.choice(opening_5_maths_v2)
-                attitude_text = fix_pronouns_in_text(attitude_5_maths_v2[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(number_5_maths_v2[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_5_maths_v2[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_5_maths_v2)
-            else:  # Science
-                opening = random.choice(opening_5_sci_v2)
-                attitude_text = fix_pronouns_in_text(attitude_5_sci_v2[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(science_5_sci_v2[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_5_sci_v2[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_5_sci_v2)
-        
-        elif year == 7:
-            if subject == "English":
-                opening = random.choice(opening_7_eng_v2)
-                attitude_text = fix_pronouns_in_text(attitude_7_eng_v2[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(reading_7_eng_v2[achieve], p, p_poss)
-                writing_text = fix_pronouns_in_text(writing_7_eng_v2[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_7_eng_v2[target], p, p_poss)
-                writing_target_text = fix_pronouns_in_text(target_write_7_eng_v2[target], p, p_poss)
-                closer_sentence = random.choice(closer_7_eng_v2)
-            elif subject == "Maths":
-                opening = random.choice(opening_7_maths_v2)
-                attitude_text = fix_pronouns_in_text(attitude_7_maths_v2[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(number_7_maths_v2[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_7_maths_v2[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_7_maths_v2)
-            else:  # Science
-                opening = random.choice(opening_7_sci_v2)
-                attitude_text = fix_pronouns_in_text(attitude_7_sci_v2[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(science_7_sci_v2[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_7_sci_v2[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_7_sci_v2)
-        
-        else:  # year == 8
-            if subject == "English":
-                opening = random.choice(opening_8_eng_v2)
-                attitude_text = fix_pronouns_in_text(attitude_8_eng_v2[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(reading_8_eng_v2[achieve], p, p_poss)
-                writing_text = fix_pronouns_in_text(writing_8_eng_v2[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_8_eng_v2[target], p, p_poss)
-                writing_target_text = fix_pronouns_in_text(target_write_8_eng_v2[target], p, p_poss)
-                closer_sentence = random.choice(closer_8_eng_v2)
-            elif subject == "Maths":
-                opening = random.choice(opening_8_maths_v2)
-                attitude_text = fix_pronouns_in_text(attitude_8_maths_v2[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(maths_8_maths_v2[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_8_maths_v2[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_8_maths_v2)
-            else:  # Science
-                opening = random.choice(opening_8_sci_v2)
-                attitude_text = fix_pronouns_in_text(attitude_8_sci_v2[att], p, p_poss)
-                reading_text = fix_pronouns_in_text(science_8_sci_v2[achieve], p, p_poss)
-                reading_target_text = fix_pronouns_in_text(target_8_sci_v2[target], p, p_poss)
-                writing_text = ""
-                writing_target_text = ""
-                closer_sentence = random.choice(closer_8_sci_v2)
-
-    # Construct sentences
-    attitude_sentence = f"{opening} {name} {attitude_text}"
-    if not attitude_sentence.endswith('.'):
-        attitude_sentence += '.'
-
-    if reading_text and reading_text[0].islower():
-        reading_text = f"{p} {reading_text}"
-    
-    if subject == "English":
-        reading_sentence = f"In reading, {reading_text}" if reading_text else ""
-    else:
-        reading_sentence = reading_text if reading_text else ""
-    
-    if not reading_sentence.endswith('.') and reading_sentence:
-        reading_sentence += '.'
-
-    if writing_text:
-        if writing_text[0].islower():
-            writing_text = f"{p} {writing_text}"
-        writing_sentence = f"In writing, {writing_text}"
-        if not writing_sentence.endswith('.'):
-            writing_sentence += '.'
-    else:
-        writing_sentence = ""
-
-    if reading_target_text:
-        reading_target_sentence = f"For the next term, {p} should {lowercase_first(reading_target_text)}"
-        if not reading_target_sentence.endswith('.'):
-            reading_target_sentence += '.'
-    else:
-        reading_target_sentence = ""
+    plan = get_comment_plan(year, subject, variant)
+    if not name_trusted:
+        name = sanitize_input(name)
+    attitude_target = sanitize_input(attitude_target) if attitude_target else ""
+    return render_comment_options(plan, name, att, achieve, target, pronouns, attitude_target,
+                                  count=ALTERNATIVES_PER_VARIANT,
+                                  salt=st.session_state.seed_salt, draw=draw,
+                                  cache=get_skeleton_cache(), table=get_skeleton_table())
 
-    if writing_target_text:
-        writing_target_sentence = f"Additionally, {p} should {lowercase_first(writing_target_text)}"
-        if not writing_target_sentence.endswith('.'):
-            writing_target_sentence += '.'
+def next_alternative(current, variant):
+    """
+    Pop the next precomputed comment for a variant, computing a fresh batch
+    of alternatives with the next draw once the queue runs out.
+    """
+    queue = current[f'variant{variant}_queue']
+    if not queue:
+        draw = current[f'variant{variant}_draw'] + 1
+        queue.extend(generate_comment_options(
+            current['subject'], current['year'], current['name'],
+            current['att'], current['achieve'], current['target'],
+            get_pronouns(current['gender']), current['attitude_target'],
+            variant=variant, draw=draw, name_trusted=True  # sanitized on submit
+        ))
+        current[f'variant{variant}_draw'] = draw
+    return queue.pop(0)
+
+def generate_batch_comments(df, variant_choice, candidates=1, all_variants=False,
+                            spread_openings=False):
+    """
+    Generate comments for one validated block of an upload into
+    selected_comments. Returns (comments added, error table) where the
+    table has VALIDATION_COLUMNS and file row numbers from df.index.
+    """
+    if not df.attrs.get(NAMES_SANITIZED):
+        sanitize_name_column(df)
+    salt = st.session_state.seed_salt
+    if variant_choice.startswith("Mixed"):
+        variants = assign_variants(df, salt=salt)
     else:
-        writing_target_sentence = ""
-
-    # Optional attitude target
-    if attitude_target:
-        attitude_target = sanitize_input(attitude_target)
-        attitude_target_sentence = f"{lowercase_first(attitude_target)}"
-        if not attitude_target_sentence.endswith('.'):
-            attitude_target_sentence += '.'
-        attitude_target_sentence = attitude_target_sentence.replace('..', '.')
+        variants = pd.Series(int(variant_choice.split()[-1]), index=df.index)
+    if 'Variant' in df.columns:
+        variants = pd.to_numeric(df['Variant'], errors='coerce').fillna(variants).astype(int)
+
+    sampling = "cycle" if spread_openings else "row"
+    if all_variants and candidates == 1 and sampling == "row":
+        table, variant_errors = generate_comments_all_variants(df, salt=salt)
+        passes = [(table[variant], variant_errors[variant], pd.Series(variant, index=df.index))
+                  for variant in table.columns]
     else:
-        attitude_target_sentence = ""
-
-    # Assemble comment
-    comment_parts = [
-        attitude_sentence,
-        reading_sentence,
-        writing_sentence,
-        reading_target_sentence,
-        writing_target_sentence,
-        closer_sentence,
-        attitude_target_sentence
-    ]
-
-    comment = " ".join([c for c in comment_parts if c])
-    comment = comment.strip()
-
-    # Fix punctuation
-    if not comment.endswith('.'):
-        comment += '.'
-    comment = comment.replace('..', '.')
-
-    comment = truncate_comment(comment, TARGET_CHARS)
-
-    # Double-check ending punctuation after truncation
-    if not comment.endswith('.'):
-        comment = comment.rstrip(' ,;') + '.'
-    comment = comment.replace('..', '.')
-
-    return comment
+        # One pass per variant when producing them all, over the rows whose
+        # Year/Subject has it, so the candidate and opening settings apply
+        # to each; the chosen or per-row variant otherwise
+        pass_rows = ([(df[rows_for_variant(df, variant)], variant) for variant in bank_variants()]
+                     if all_variants else [(df, variants)])
+        passes = []
+        for rows, variant in pass_rows:
+            row_variants = pd.Series(variant, index=rows.index) if all_variants else variant
+            if candidates > 1:
+                ranked, errors = generate_comment_candidates(rows, variant=row_variants, salt=salt,
+                                                             candidates=int(candidates))
+                passes.append((ranked[1], errors, row_variants))
+            else:
+                comments, errors = generate_comments_batch(rows, variant=row_variants, salt=salt,
+                                                           sampling=sampling)
+                passes.append((comments, errors, row_variants))
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+    # Columns are already typed by apply_csv_schema, so take them whole
+    names = df['Student Name'].tolist() if 'Student Name' in df.columns else [''] * len(df)
+    subjects = df['Subject'].astype(str).tolist() if 'Subject' in df.columns else ['English'] * len(df)
+    years = df['Year'].tolist() if 'Year' in df.columns else [7] * len(df)
+
+    generated = 0
+    problems = []
+    for position, idx in enumerate(df.index):
+        for comments, errors, row_variants in passes:
+            if idx not in row_variants.index:
+                continue  # this variant has no bank for the row's Year/Subject
+            label = f"Variant {row_variants[idx]}"
+            if idx in errors:
+                problems.append({'Row': idx + 1, 'Student Name': names[position],
+                                 'Column': label, 'Problem': errors[idx]})
+                continue
+            if comments[idx] is None:
+                continue  # no bank for this variant (generate_comments_all_variants)
+
+            student_entry = {
+                'name': names[position],
+                'subject': subjects[position],
+                'year': years[position],
+                'comment': comments[idx],
+                'variant': label,
+                'timestamp': timestamp
+            }
+            st.session_state.selected_comments.append(student_entry)
+            generated += 1
+    return generated, pd.DataFrame(problems, columns=VALIDATION_COLUMNS)
 
 # ========== STREAMLIT APP LAYOUT ==========
 
@@ -568,7 +276,7 @@ with st.sidebar:
     st.info("""
     - No data stored on servers
     - All processing in memory
-    - Auto-deletion of temp files
+    - Uploads never written to disk
     - Input sanitization
     - Rate limiting enabled
     """)
@@ -578,12 +286,15 @@ with st.sidebar:
         st.session_state.app_initialized = True
         st.session_state.upload_count = 0
         st.session_state.last_upload_time = datetime.now()
+        st.session_state.seed_salt = secrets.token_hex(8)
         st.session_state.current_student = {}
         st.session_state.selected_comments = []
         st.success("All data cleared!")
         st.rerun()
 
     st.markdown("---")
+    cache_stats = get_skeleton_cache().stats()
+    st.caption(f"Comment cache: {cache_stats['hit_rate']:.0%} hits • {cache_stats['entries']} skeletons")
     st.caption("v3.0 • Multi-Year Edition")
 
 # Main content
@@ -673,11 +384,11 @@ if app_mode == "Single Student":
 
         with col1:
             # Use last selected values as defaults
-            subject_options = ["English", "Maths", "Science"]
+            subject_options = bank_subjects()
             subject_index = subject_options.index(st.session_state.last_subject) if st.session_state.last_subject in subject_options else 0
             subject = st.selectbox("Subject", subject_options, index=subject_index)
 
-            year_options = [5, 7, 8]
+            year_options = bank_years()
             year_index = year_options.index(st.session_state.last_year) if st.session_state.last_year in year_options else 1
             year = st.selectbox("Year", year_options, index=year_index)
 
@@ -722,12 +433,11 @@ if app_mode == "Single Student":
         pronouns = get_pronouns(gender)
 
         with st.spinner("Generating comment..."):
-            # Generate Variant 1 only
-            comment_v1 = generate_comment(subject, year, name, gender, att, achieve,
-                                         target, pronouns,
-                                         st.session_state.get('attitude_target_input', ''),
-                                         variant=1)
-            
+            # Every variant's alternatives are computed up front so the
+            # Generate and Regenerate buttons only reveal a stored comment
+            attitude_target = st.session_state.get('attitude_target_input', '')
+            variants = bank_variants(year, subject)
+
             # Store in session state
             st.session_state.current_student = {
                 'name': name,
@@ -737,135 +447,90 @@ if app_mode == "Single Student":
                 'att': att,
                 'achieve': achieve,
                 'target': target,
-                'attitude_target': st.session_state.get('attitude_target_input', ''),
-                'variant1': comment_v1,
-                'variant2': None,  # Will be generated if requested
-                'variant1_approved': False,
-                'variant2_approved': False
+                'attitude_target': attitude_target,
+                'variants': variants,
             }
+            for variant in variants:
+                options = generate_comment_options(subject, year, name, att, achieve,
+                                                   target, pronouns, attitude_target, variant=variant,
+                                                   name_trusted=True)
+                # The first variant is shown straight away; the rest are
+                # revealed from their queue if requested
+                first = variant == variants[0]
+                st.session_state.current_student.update({
+                    f'variant{variant}': options[0] if first else None,
+                    f'variant{variant}_queue': options[1:] if first else options,
+                    f'variant{variant}_draw': 0,
+                    f'variant{variant}_approved': False,
+                })
 
         st.session_state.progress = 2
         st.rerun()
 
-    # Display generated Variant 1 if it exists
-    if st.session_state.current_student and 'variant1' in st.session_state.current_student:
+    # Display the generated variants if they exist
+    if st.session_state.current_student and 'variants' in st.session_state.current_student:
         current = st.session_state.current_student
         name = current['name']
         subject = current['subject']
         year = current['year']
-        comment_v1 = current['variant1']
-        
+        revealed = [variant for variant in current['variants'] if current[f'variant{variant}']]
+
         st.subheader(f"📝 Generated Comment for {name} ({subject} Year {year})")
-        
-        # Display Variant 1
-        st.markdown("### Variant 1 (Default)")
-        st.text_area("Variant 1 Comment", comment_v1, height=150, key="variant1_display")
-        
-        # Character count
-        char_count_v1 = len(comment_v1)
-        st.caption(f"Characters: {char_count_v1}/{TARGET_CHARS}")
-        
-        # Action buttons for Variant 1
-        col1_actions, col2_actions = st.columns([1, 1])
-        
-        with col1_actions:
-            if not current['variant1_approved']:
-                if st.button("✅ Approve Variant 1", type="primary", use_container_width=True):
-                    # Add to selected comments
-                    student_entry = {
-                        'name': name,
-                        'subject': subject,
-                        'year': year,
-                        'comment': comment_v1,
-                        'variant': 'Variant 1',
-                        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M")
-                    }
-                    st.session_state.selected_comments.append(student_entry)
-                    st.session_state.current_student['variant1_approved'] = True
-                    st.success(f"✓ Variant 1 approved for {name}!")
-                    st.rerun()
-            else:
-                st.success("✓ Variant 1 already approved")
-                
-        with col2_actions:
-            if st.button("🔄 Regenerate Variant 1", type="secondary", use_container_width=True):
-                pronouns = get_pronouns(current['gender'])
-                new_comment = generate_comment(
-                    subject, year, name, current['gender'], 
-                    current['att'], current['achieve'], current['target'],
-                    pronouns, current['attitude_target'], variant=1
-                )
-                st.session_state.current_student['variant1'] = new_comment
-                st.session_state.current_student['variant1_approved'] = False
-                st.success("Variant 1 regenerated!")
-                st.rerun()
-        
-        st.markdown("---")
-        
-        # Check if Variant 2 has been generated
-        if current['variant2']:
-            st.markdown("### Variant 2 (Alternative)")
-            st.text_area("Variant 2 Comment", current['variant2'], height=150, key="variant2_display")
-            
+
+        for variant in revealed:
+            comment = current[f'variant{variant}']
+            role = "Default" if variant == current['variants'][0] else "Alternative"
+            st.markdown(f"### Variant {variant} ({role})")
+            st.text_area(f"Variant {variant} Comment", comment, height=150, key=f"variant{variant}_display")
+
             # Character count
-            char_count_v2 = len(current['variant2'])
-            st.caption(f"Characters: {char_count_v2}/{TARGET_CHARS}")
-            
-            # Action buttons for Variant 2
-            col1_v2, col2_v2 = st.columns([1, 1])
-            
-            with col1_v2:
-                if not current['variant2_approved']:
-                    if st.button("✅ Approve Variant 2", type="primary", use_container_width=True):
+            st.caption(f"Characters: {len(comment)}/{TARGET_CHARS}")
+
+            # Action buttons for this variant
+            col1_actions, col2_actions = st.columns([1, 1])
+
+            with col1_actions:
+                if not current[f'variant{variant}_approved']:
+                    if st.button(f"✅ Approve Variant {variant}", type="primary", use_container_width=True):
                         # Add to selected comments
                         student_entry = {
                             'name': name,
                             'subject': subject,
                             'year': year,
-                            'comment': current['variant2'],
-                            'variant': 'Variant 2',
+                            'comment': comment,
+                            'variant': f'Variant {variant}',
                             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M")
                         }
                         st.session_state.selected_comments.append(student_entry)
-                        st.session_state.current_student['variant2_approved'] = True
-                        st.success(f"✓ Variant 2 approved for {name}!")
+                        st.session_state.current_student[f'variant{variant}_approved'] = True
+                        st.success(f"✓ Variant {variant} approved for {name}!")
                         st.rerun()
                 else:
-                    st.success("✓ Variant 2 already approved")
-                    
-            with col2_v2:
-                if st.button("🔄 Regenerate Variant 2", type="secondary", use_container_width=True):
-                    pronouns = get_pronouns(current['gender'])
-                    new_comment = generate_comment(
-                        subject, year, name, current['gender'], 
-                        current['att'], current['achieve'], current['target'],
-                        pronouns, current['attitude_target'], variant=2
-                    )
-                    st.session_state.current_student['variant2'] = new_comment
-                    st.session_state.current_student['variant2_approved'] = False
-                    st.success("Variant 2 regenerated!")
+                    st.success(f"✓ Variant {variant} already approved")
+
+            with col2_actions:
+                if st.button(f"🔄 Regenerate Variant {variant}", type="secondary", use_container_width=True):
+                    st.session_state.current_student[f'variant{variant}'] = next_alternative(current, variant)
+                    st.session_state.current_student[f'variant{variant}_approved'] = False
+                    st.success(f"Variant {variant} regenerated!")
                     st.rerun()
-        
-        # Generate Variant 2 button (only if not already generated)
-        if not current['variant2']:
+
             st.markdown("---")
-            if st.button("✨ Generate Variant 2 (Alternative)", type="secondary", use_container_width=True):
-                pronouns = get_pronouns(current['gender'])
-                with st.spinner("Generating Variant 2..."):
-                    comment_v2 = generate_comment(
-                        subject, year, name, current['gender'], 
-                        current['att'], current['achieve'], current['target'],
-                        pronouns, current['attitude_target'], variant=2
-                    )
-                    st.session_state.current_student['variant2'] = comment_v2
-                    st.success("Variant 2 generated!")
+
+        # Generate buttons for the variants not shown yet
+        for variant in current['variants']:
+            if variant not in revealed:
+                if st.button(f"✨ Generate Variant {variant} (Alternative)", type="secondary",
+                             use_container_width=True):
+                    st.session_state.current_student[f'variant{variant}'] = next_alternative(current, variant)
+                    st.success(f"Variant {variant} generated!")
                     st.rerun()
-        
+
         # Navigation buttons
         st.markdown("---")
-        col_nav1, col_nav2, col_nav3 = st.columns([1, 1, 1])
-        
-        with col_nav1:
+        col_nav = st.columns(1 + len(revealed))
+
+        with col_nav[0]:
             if st.button("➕ Add Another Student", type="primary", use_container_width=True):
                 # Clear current student but keep selected comments
                 st.session_state.current_student = {}
@@ -875,29 +540,26 @@ if app_mode == "Single Student":
                     st.session_state.attitude_target_input = ""
                 st.session_state.progress = 1
                 st.rerun()
-                
-        with col_nav2:
-            if st.button("📋 Copy Variant 1", type="secondary", use_container_width=True):
-                st.code(comment_v1, language=None)
-                st.success("✓ Variant 1 copied to clipboard!")
-                
-        with col_nav3:
-            if current['variant2']:
-                if st.button("📋 Copy Variant 2", type="secondary", use_container_width=True):
-                    st.code(current['variant2'], language=None)
-                    st.success("✓ Variant 2 copied to clipboard!")
+
+        for column, variant in zip(col_nav[1:], revealed):
+            with column:
+                if st.button(f"📋 Copy Variant {variant}", type="secondary", use_container_width=True):
+                    st.code(current[f'variant{variant}'], language=None)
+                    st.success(f"✓ Variant {variant} copied to clipboard!")
 
 # ========== BATCH UPLOAD MODE ==========
 elif app_mode == "Batch Upload":
     st.subheader("📁 Batch Upload (CSV)")
 
-    st.info("""
+    variant_list = " or ".join(str(variant) for variant in bank_variants())
+    st.info(f"""
     **CSV Format Required:**
     - Columns: Student Name, Gender, Subject, Year, Attitude, Achievement, Target
     - Gender: Male/Female
     - Subject: English/Maths/Science
     - Year: 5, 7, or 8
-    - Bands: 90,85,80,75,70,65,60,55,40
+    - Bands: 90,85,80,75,70,65,60,55,40 (raw marks such as 72 are snapped to the band below)
+    - Optional Variant column: {variant_list} per student, where that Year/Subject has the bank (blank uses the Variant chosen below)
     """)
 
     example_csv = """Student Name,Gender,Subject,Year,Attitude,Achievement,Target
@@ -921,57 +583,75 @@ Sarah,Female,Science,8,85,90,85"""
             st.stop()
 
         with st.spinner("Processing CSV securely..."):
-            df = process_csv_securely(uploaded_file)
+            result = process_csv_securely(uploaded_file)
 
-        if df is not None:
-            st.success(f"Processed {len(df)} students successfully")
+        if result is not None:
+            preview, total_rows, upload_errors = result
+            skipped = upload_errors['Row'].nunique()
+            st.success(f"Loaded {total_rows} students: {total_rows - skipped} ready to generate")
+            if skipped:
+                st.error(f"{skipped} row(s) have problems and will be skipped")
+                st.dataframe(upload_errors, hide_index=True)
 
             with st.expander("📋 Preview Data (First 5 rows)"):
-                st.dataframe(df.head())
+                st.dataframe(preview)
 
-            if st.button("🚀 Generate All Comments (Variant 1)", type="primary"):
+            variant_choice = st.selectbox(
+                "Variant",
+                [f"Variant {v}" for v in bank_variants()] + ["Mixed (weighted)"],
+                help="Mixed picks a variant per student using the configured variant weights"
+            )
+            candidates = st.number_input(
+                "Candidates per student", min_value=1, max_value=16, value=1,
+                help="Draw several comments per student and keep the one closest to "
+                     f"{TARGET_CHARS} characters with the least repeated phrasing in the class"
+            )
+            all_variants = st.checkbox(
+                "Generate all variants",
+                help="Produce every variant for each student so you can choose per student. "
+                     "The Variant choice above and any Variant column in the CSV are ignored; "
+                     "the candidate and opening settings apply to each variant"
+            )
+            spread_openings = st.checkbox(
+                "Avoid repeating openings within a class",
+                help="Deal openings and closers so none repeats for a Year/Subject "
+                     f"until all have been used, within each block of {CSV_CHUNK_ROWS} rows"
+            )
+
+            batch_label = "All Variants" if all_variants else variant_choice
+            if st.button(f"🚀 Generate All Comments ({batch_label})", type="primary"):
                 if 'selected_comments' not in st.session_state:
                     st.session_state.selected_comments = []
 
                 progress_bar = st.progress(0)
                 status_text = st.empty()
 
-                for idx, row in df.iterrows():
-                    progress = (idx + 1) / len(df)
-                    progress_bar.progress(progress)
-                    status_text.text(f"Processing {idx + 1}/{len(df)}: {row.get('Student Name', 'Student')}")
-
-                    try:
-                        pronouns = get_pronouns(str(row.get('Gender', '')).lower())
-                        comment = generate_comment(
-                            subject=str(row.get('Subject', 'English')),
-                            year=int(row.get('Year', 7)),
-                            name=str(row.get('Student Name', '')),
-                            gender=str(row.get('Gender', '')),
-                            att=int(row.get('Attitude', 75)),
-                            achieve=int(row.get('Achievement', 75)),
-                            target=int(row.get('Target', 75)),
-                            pronouns=pronouns,
-                            variant=1
-                        )
-
-                        student_entry = {
-                            'name': sanitize_input(str(row.get('Student Name', ''))),
-                            'subject': str(row.get('Subject', 'English')),
-                            'year': int(row.get('Year', 7)),
-                            'comment': comment,
-                            'variant': 'Variant 1',
-                            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M")
-                        }
-                        st.session_state.selected_comments.append(student_entry)
-
-                    except Exception as e:
-                        st.error(f"Error processing row {idx + 1}: {e}")
+                generated = rows_read = 0
+                failures = []
+                try:
+                    # Problems were already shown above, so only the clean rows are used here.
+                    # Each block is generated before the next is read, so memory stays bounded.
+                    for chunk, _, rows_read, _ in iter_csv_chunks(uploaded_file.getvalue(), MAX_ROWS_PER_UPLOAD,
+                                                                  **read_csv_options()):
+                        added, problems = generate_batch_comments(chunk, variant_choice, candidates,
+                                                                  all_variants, spread_openings)
+                        generated += added
+                        if len(problems):
+                            failures.append(problems)
+                        progress_bar.progress(rows_read / max(total_rows, 1))
+                        status_text.text(f"Processed {rows_read}/{total_rows} rows")
+                except (pd.errors.ParserError, UnicodeDecodeError) as e:
+                    st.error(f"Error reading CSV after row {rows_read}: {e}")
+
+                if failures:
+                    failures = pd.concat(failures, ignore_index=True)
+                    st.error(f"{len(failures)} comment(s) could not be generated")
+                    st.dataframe(failures, hide_index=True)
 
                 progress_bar.empty()
                 status_text.empty()
                 st.session_state.progress = 2
-                st.success(f"Generated {len(df)} comments (Variant 1)!")
+                st.success(f"Generated {generated} comments ({batch_label})!")
                 st.session_state.last_upload_time = datetime.now()
 
 # ========== PRIVACY INFO MODE ==========
@@ -984,13 +664,13 @@ elif app_mode == "Privacy Info":
     **Data Handling:**
     - All processing happens in your browser's memory
     - No student data is sent to or stored on our servers
-    - Temporary files are created and immediately deleted
+    - Uploaded files are parsed in memory and never written to disk
     - No database or persistent storage is used
 
     **Security Features:**
     1. **Input Sanitization** - Removes special characters from names
     2. **File Validation** - Checks file size and type
-    3. **Auto-Cleanup** - Temporary files deleted after processing
+    3. **No Temporary Files** - Uploads never touch the server's disk
     4. **Memory Clearing** - All data erased on browser close
 
     **Best Practices for Users:**
@@ -1115,12 +795,12 @@ with footer_cols[1]:
         1. **Select**: Choose student details
         2. **Generate**: Creates Variant 1 (default)
         3. **Approve**: Click "Approve Variant 1" to add to download list
-        4. **Optional**: Generate Variant 2 if needed
+        4. **Optional**: Generate the other variants if needed
         5. **Download**: Export approved comments
 
         **Features:**
         - Variant 1: Generated automatically
-        - Variant 2: Optional alternative style
+        - Other variants: Optional alternative styles
         - Approve individually: Choose which variants to keep
         - Regenerate: Get new versions if needed
 
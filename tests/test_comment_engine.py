@@ -0,0 +1,213 @@
+import io
+import os
+import random
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import comment_engine
+from comment_engine import (
+    BANK_MODULES,
+    CSV_READ_DTYPES,
+    PRONOUN_SETS,
+    TARGET_CHARS,
+    _bank_texts,
+    _legacy_fix_pronouns,
+    _skeleton_length,
+    assign_variants,
+    build_plan_snapshot,
+    clean_upload_chunk,
+    compile_template,
+    discover_bank_modules,
+    fix_pronouns_in_text,
+    generate_comments_all_variants,
+    generate_comments_batch,
+    generate_comments_parallel,
+    get_comment_plan,
+    get_template,
+    iter_csv_chunks,
+    load_plan_snapshot,
+    render_comment,
+    sanitize_input,
+    sanitize_name_column,
+    snap_plan_scores,
+)
+
+
+def _students(rows, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Student Name': [f"Student{i}" for i in range(rows)],
+        'Gender': rng.choice(["Male", "Female", "Other"], rows),
+        'Subject': rng.choice(["English", "Maths", "Science"], rows),
+        'Year': rng.choice([5, 7, 8], rows),
+        'Attitude': rng.integers(40, 100, rows),
+        'Achievement': rng.integers(0, 100, rows),
+        'Target': rng.integers(0, 100, rows),
+    })
+
+
+def _csv(*rows):
+    header = "Student Name,Gender,Subject,Year,Attitude,Achievement,Target\n"
+    return (header + "".join(f"{row}\n" for row in rows)).encode()
+
+
+def _openings(comments):
+    return {comment.split(",")[0] for comment in comments}
+
+
+@pytest.mark.parametrize("pronouns", PRONOUN_SETS)
+def test_pronoun_rewriter_matches_legacy_on_bank_texts(pronouns):
+    # The bank texts carry no pronouns of their own, and the legacy chain
+    # is only correct for lower-case "he" and "his", so add those
+    for text in _bank_texts():
+        text = f"{text}, and he showed his working"
+        assert fix_pronouns_in_text(text, *pronouns) == _legacy_fix_pronouns(text, *pronouns)
+
+
+def test_pronoun_rewriter_keeps_case_and_pronoun_forms():
+    text = "He asked him to check his work himself. HIS effort showed."
+    assert (fix_pronouns_in_text(text, "she", "her")
+            == "She asked her to check her work herself. HER effort showed.")
+    assert (fix_pronouns_in_text(text, "they", "their")
+            == "They asked them to check their work themselves. THEIR effort showed.")
+
+
+@pytest.mark.parametrize("key", sorted(BANK_MODULES))
+def test_compiled_templates_match_legacy_substitution(key, monkeypatch):
+    plan = get_comment_plan(*key)
+    with monkeypatch.context() as patch:
+        patch.setattr(comment_engine, "fix_pronouns_in_text", _legacy_fix_pronouns)
+        legacy = {pronouns: compile_template(plan, pronouns) for pronouns in PRONOUN_SETS}
+    for pronouns in PRONOUN_SETS:
+        assert compile_template(plan, pronouns) == legacy[pronouns]
+        assert plan['templates'][pronouns] == legacy[pronouns]
+
+    legacy_plan = {**plan, 'templates': legacy}
+    bands = plan['bands']
+    for pronouns in PRONOUN_SETS:
+        for seed, scores in enumerate(product(bands['attitude'], bands['achievement'], bands['target'])):
+            assert (render_comment(plan, "Sam", *scores, pronouns, seed=seed)
+                    == render_comment(legacy_plan, "Sam", *scores, pronouns, seed=seed))
+
+
+def test_group_without_fitting_pair_varies_openings():
+    # Y7 English 75/75/75 is too long for any opening/closer pair to fit
+    plan = get_comment_plan(7, "English", 1)
+    bands = snap_plan_scores(plan, 75, 75, 75)
+    fixed = _skeleton_length(get_template(plan, ("he", "his")), *bands) + len("Student10")
+    assert fixed + plan['pair_lengths'][0][0] > TARGET_CHARS
+    df = pd.DataFrame({
+        'Student Name': [f"Student{i}" for i in range(12)],
+        'Gender': "Male", 'Subject': "English", 'Year': 7,
+        'Attitude': 75, 'Achievement': 75, 'Target': 75,
+    })
+    comments, errors = generate_comments_batch(df, salt="test")
+    assert not errors
+    assert all(len(comment) <= TARGET_CHARS for comment in comments)
+    assert len(_openings(comments)) > 1
+
+
+def test_cycle_sampling_deals_openings_when_no_pair_fits():
+    plan = get_comment_plan(7, "English", 1)
+    rows = len(plan['opening_heads'])
+    df = pd.DataFrame({
+        'Student Name': [f"Student{i}" for i in range(rows)],
+        'Gender': "Male", 'Subject': "English", 'Year': 7,
+        'Attitude': 75, 'Achievement': 75, 'Target': 75,
+    })
+    for salt in ("a", "b", "c"):
+        comments, errors = generate_comments_batch(df, salt=salt, sampling="cycle")
+        assert not errors
+        assert len(_openings(comments)) == rows
+
+
+def test_parallel_pool_matches_in_process(monkeypatch):
+    monkeypatch.setattr(comment_engine, "PARALLEL_MIN_ROWS", 0)
+    monkeypatch.setattr(comment_engine, "MIN_CHUNK_ROWS", 50)
+    df = _students(400)
+    variants = assign_variants(df, salt="test")
+    progress = []
+    comments, errors = generate_comments_parallel(df, variant=variants, salt="test", workers=2,
+                                                  progress=lambda done, total: progress.append(done))
+    expected, expected_errors = generate_comments_batch(df, variant=variants, salt="test")
+    pd.testing.assert_series_equal(comments, expected)
+    assert errors == expected_errors
+    assert len(progress) > 2 and progress[-1] == len(df)
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 4, reason="the pool only pays off with several cores")
+def test_parallel_pool_is_faster_at_the_threshold():
+    single, pooled = comment_engine.bench_parallel(workers=4)
+    assert pooled < single
+
+
+def test_discovery_skips_subjects_without_a_layout(tmp_path, monkeypatch):
+    monkeypatch.setattr(comment_engine, "SKIPPED_BANKS", {})
+    for filename in ("statements_year9_History_variant1.py", "statements_year9_maths_variant2.py"):
+        (tmp_path / filename).write_text("")
+    assert discover_bank_modules(tmp_path) == {(9, "Maths", 2): "statements_year9_maths_variant2"}
+    assert list(comment_engine.SKIPPED_BANKS) == ["statements_year9_History_variant1"]
+
+
+def test_snapshot_build_skips_a_broken_bank(tmp_path, monkeypatch):
+    broken = (9, "Maths", 1)
+    monkeypatch.setattr(comment_engine, "SKIPPED_BANKS", {})
+    monkeypatch.setattr(comment_engine, "BANK_MODULES", {**BANK_MODULES, broken: "statements_missing"})
+    monkeypatch.setattr(comment_engine, "_source_hash", None)
+    path = tmp_path / "banks.snapshot"
+    assert build_plan_snapshot(path) == len(BANK_MODULES)
+    assert broken not in comment_engine.BANK_MODULES
+    assert "statements_missing" in comment_engine.SKIPPED_BANKS
+    assert load_plan_snapshot(path, rebuild=False)
+
+
+def test_unreadable_cells_are_reported_once_and_rows_skipped():
+    df = pd.read_csv(io.BytesIO(_csv("Amy,Female,English,seven,75,80,85",
+                                     "Ben,Male,Maths,7,high,72.5,80",
+                                     "Cal,Male,Science,8,70,72.5,85")), dtype=CSV_READ_DTYPES)
+    clean, errors = clean_upload_chunk(df)
+    assert clean['Student Name'].tolist() == ["Cal"]
+    assert clean['Achievement'].tolist() == [70]
+    assert errors[['Row', 'Column', 'Problem']].values.tolist() == [
+        [1, "Year", "Year is not a valid whole number"],
+        [2, "Attitude", "Attitude is not a number"],
+    ]
+
+
+def test_duplicate_students_are_caught_across_chunks():
+    data = _csv("Amy,Female,English,7,75,80,85", "Ben,Male,Maths,7,70,80,85",
+                "Cal,Male,Science,8,70,80,85", "amy,Female,English,7,60,60,60",
+                "Dan,Male,Maths,7,70,80,85")
+    chunks = list(iter_csv_chunks(data, max_rows=4, chunk_rows=2))
+    assert [rows for _, _, rows, _ in chunks] == [2, 4, 4]
+    assert chunks[-1][3] and not len(chunks[-1][0])  # only the fifth row, past max_rows
+    errors = pd.concat([errors for _, errors, _, _ in chunks])
+    assert errors[['Row', 'Column']].values.tolist() == [[4, "Student Name"]]
+    assert sum(len(clean) for clean, _, _, _ in chunks) == 3
+
+
+def test_name_column_sanitizer_matches_sanitize_input():
+    rng = random.Random(0)
+    alphabet = "abcXYZ _-.'!<>&;\"/\\0129éßøДж中👍\t"
+    names = ["".join(rng.choice(alphabet) for _ in range(rng.randrange(0, 120)))
+             for _ in range(2000)]
+    df = sanitize_name_column(pd.DataFrame({'Student Name': [*names, None]}))
+    assert df['Student Name'].tolist() == [sanitize_input(name) for name in names] + [""]
+
+
+def test_all_variants_skips_variants_a_class_does_not_have(monkeypatch):
+    extra = (7, "Maths", 3)
+    monkeypatch.setattr(comment_engine, "BANK_MODULES",
+                        {**BANK_MODULES, extra: BANK_MODULES[(7, "Maths", 1)]})
+    monkeypatch.setattr(comment_engine, "_comment_plans", dict(comment_engine._comment_plans))
+    df = _students(60)
+    comments, errors = generate_comments_all_variants(df, salt="test")
+    assert list(comments.columns) == [1, 2, 3]
+    assert errors == {1: {}, 2: {}, 3: {}}
+    has_third = (df['Year'] == 7) & (df['Subject'] == "Maths")
+    assert has_third.any()
+    assert comments[3].notna().tolist() == has_third.tolist()
+    assert comments[[1, 2]].notna().all().all()